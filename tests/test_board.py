@@ -28,6 +28,100 @@ class Test_board(unittest.TestCase):
         hash3 = board3.hash
         self.assertEqual(hash1, hash3)
 
+    def test_hash_incremental(self):
+        # Play a sequence of moves, with a promotion (sb3-a1) and a capture
+        # (sc1xc2), and check the incremental hash against one from scratch.
+        board = bd.Board(f"{GAMES_PATH}test_minimax_09.cor")
+        move_list = [
+            [15, 2], [8, 7], [2, 0], [7, 6], [41, 40], [6, 5], [4, 5]
+        ]
+        hash_list = [board.hash]
+        undo_list = []
+        for move in move_list:
+            captured_piece, leaving_piece, old_hash = board.make_move(*move)
+            self.assertEqual(board.hash, board.calculate_hash())
+            hash_list.append(board.hash)
+            undo_list.append((move, captured_piece, leaving_piece, old_hash))
+        self.assertEqual(len(set(hash_list)), len(hash_list))
+
+        # Unmake all moves, checking the hash values found before.
+        for move, captured_piece, leaving_piece, old_hash in \
+                reversed(undo_list):
+            hash_list.pop()
+            board.unmake_move(
+                move[0], move[1], captured_piece, leaving_piece, old_hash)
+            self.assertEqual(board.hash, hash_list[-1])
+            self.assertEqual(board.hash, board.calculate_hash())
+
+    def test_promotion(self):
+        # A Soldier promoted to Prince is the same piece, retyped.
+        board = bd.Board(f"{GAMES_PATH}test_minimax_09.cor")
+        soldier = board.board1d[15]
+        n_pieces = len(board.pieces[bd.BLACK])
+        move_list = [[15, 2], [8, 7], [2, 0]]
+        undo_list = []
+        for move in move_list:
+            undo_list.append((move, *board.make_move(*move)))
+        _, captured_piece, leaving_piece, old_hash = undo_list[-1]
+        self.assertIs(leaving_piece, soldier)
+        self.assertIs(board.board1d[0], soldier)
+        self.assertEqual(soldier.type, bd.PRINCE)
+        self.assertEqual(board.piece_count[bd.BLACK][bd.PRINCE], 2)
+        self.assertEqual(len(board.pieces[bd.BLACK]), n_pieces)
+
+        # Unmake all moves.
+        for move, captured_piece, leaving_piece, old_hash in \
+                reversed(undo_list):
+            board.unmake_move(
+                move[0], move[1], captured_piece, leaving_piece, old_hash)
+        self.assertIs(board.board1d[15], soldier)
+        self.assertEqual(soldier.type, bd.SOLDIER)
+        self.assertEqual(board.piece_count[bd.BLACK][bd.PRINCE], 1)
+        self.assertEqual(
+            [board.pieces[bd.BLACK].index(p) for p in board.pieces[bd.BLACK]],
+            [p.index for p in board.pieces[bd.BLACK]]
+        )
+
+    def test_hash_turn(self):
+        # Same pieces with different side to move.
+        board1 = bd.Board(f"{GAMES_PATH}test_minimax_09.cor")
+        board2 = bd.Board(f"{GAMES_PATH}test_minimax_09.cor")
+        board2.flip_turn()
+        self.assertNotEqual(board1.hash, board2.hash)
+        board2.set_turn(board1.turn)
+        self.assertEqual(board1.hash, board2.hash)
+
+    def test_rays_reach_cache(self):
+        # The cache of a coord never grows past its cap, and results
+        # stay the same after it is started over.
+        reach_table = bd.knight_reach[24]
+        inner_mask, _, cache = reach_table
+        cache.clear()
+        expected = {}
+        occupancy = 0
+        for _ in range(bd.RAYS_CACHE_SIZE + 10):
+            # Next subset of inner_mask.
+            occupancy = (occupancy - inner_mask) & inner_mask
+            expected[occupancy] = bd.rays_reach(reach_table, occupancy)
+            self.assertLessEqual(len(cache), bd.RAYS_CACHE_SIZE)
+        for occupancy, reach in expected.items():
+            self.assertEqual(bd.rays_reach(reach_table, occupancy), reach)
+
+    def test_null_move(self):
+        # Passing the turn changes only the turn (and hash), and back.
+        board = bd.Board(f"{GAMES_PATH}initial_position.cor")
+        turn, hash = board.turn, board.hash
+        attack_map = board.attack_map(bd.WHITE)
+        old_hash = board.make_null_move()
+        self.assertEqual(old_hash, hash)
+        self.assertNotEqual(board.turn, turn)
+        self.assertEqual(board.hash, board.calculate_hash())
+        self.assertEqual(board.attack_map(bd.WHITE), attack_map)
+        board.unmake_null_move(old_hash)
+        self.assertEqual(board.turn, turn)
+        self.assertEqual(board.hash, hash)
+        self.assertEqual(board.hash, board.calculate_hash())
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -192,6 +192,30 @@ class Test_utils(unittest.TestCase):
             output_file, expected_output_file)
             )
 
+    def test_calculate_ray_reach_table(self):
+        # Ray from a1 (0) along row 1: b1, b2, c1...
+        ray = [1, 2, 3]
+        inner_mask, reach_table = ut.calculate_ray_reach_table(ray)
+        self.assertEqual(inner_mask, 0b110)
+        # Define tests and expected results: occupancy, coords reached.
+        test_cases = [
+            [[], [1, 2, 3]],
+            [[1], [1]],
+            [[2], [1, 2]],
+            [[3], [1, 2, 3]],
+            [[2, 3], [1, 2]],
+            [[1, 2], [1]]
+        ]
+        for occupancy, expected_coords in test_cases:
+            occupied = ut.coords_2_mask(occupancy)
+            self.assertEqual(
+                ut.mask_2_coords(reach_table[occupied & inner_mask]),
+                expected_coords,
+                "Error found with occupancy {}".format(occupancy)
+            )
+        # Every occupancy of the inner coords is precalculated.
+        self.assertEqual(len(reach_table), 2 ** (len(ray) - 1))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -5,6 +5,8 @@ import glob
 import unittest
 import filecmp
 import cProfile
+import pickle
+import multiprocessing
 import numpy as np
 from os.path import dirname, realpath
 
@@ -66,6 +68,72 @@ class Test_gameplay(unittest.TestCase):
             output_file, expected_output_file)
             )
 
+    def test_attack_map(self):
+        file_list = (
+            "position_01.cor",
+            "position_05.cor",
+            "game_record_23F2020.cor",
+            "endgame_05.cor"
+        )
+        for file_name in file_list:
+            board = bd.Board(GAMES_PATH + file_name)
+            for side in [bd.WHITE, bd.BLACK]:
+                # Coords attacked, scanning each one on its own.
+                board.attack_maps = [None, None]
+                expected_coords = [
+                    position for position in range(bd.N_POSITIONS)
+                    if gp.position_attacked(board, position, side)
+                ]
+                # Coords in the attack map.
+                attack_map = board.attack_map(side)
+                self.assertEqual(
+                    ut.mask_2_coords(attack_map), expected_coords,
+                    "Error found in position {} for {}.".format(
+                        file_name, bd.color_name[side])
+                )
+            # Maps are recalculated after a move, and restored after unmake.
+            moves, _ = gp.generate_pseudomoves(board)
+            coord1, coord2 = moves[0]
+            captured_piece, leaving_piece, old_hash = \
+                board.make_move(coord1, coord2)
+            self.assertEqual(board.attack_maps, [None, None])
+            board.unmake_move(
+                coord1, coord2, captured_piece, leaving_piece, old_hash)
+            self.assertEqual(board.attack_maps[bd.BLACK], attack_map)
+
+    def test_generate_legal_moves(self):
+        file_list = (
+            "position_09.cor",
+            "position_10.cor",
+            "endgame_07.cor",
+            "strategy_01.cor",
+            "strategy_09.cor",
+            "test_make_pseudomove_06.cor",
+            "test_make_pseudomove_12.cor",
+            "test_minimax_01.cor",
+            "test_minimax_05.cor",
+            "test_quiesce_05.cor"
+        )
+        for file_name in file_list:
+            board = bd.Board(GAMES_PATH + file_name)
+            # Legal moves, filtering pseudomoves with make/unmake.
+            pseudomoves, _ = gp.generate_pseudomoves(board)
+            expected_moves = []
+            for coord1, coord2 in pseudomoves:
+                captured_piece, leaving_piece, old_hash = \
+                    board.make_move(coord1, coord2)
+                if gp.is_legal(board):
+                    expected_moves.append([coord1, coord2])
+                board.unmake_move(
+                    coord1, coord2, captured_piece, leaving_piece, old_hash)
+            # Legal moves generated directly.
+            moves, moves_count = gp.generate_legal_moves(board)
+            self.assertEqual(moves_count, len(moves))
+            self.assertEqual(
+                sorted(moves), sorted(expected_moves),
+                "Error found in position {}.".format(file_name)
+            )
+
     def test_generate_pseudomoves(self):
         file_list = (
             "position_01.cor",
@@ -257,6 +325,115 @@ class Test_gameplay(unittest.TestCase):
                     file_name, killer_moves)
             )
 
+    def test_pick_moves(self):
+
+        # Test cases: position, hash move, killer moves.
+        test_cases = (
+            ("test_captures_00.cor", None, [None, None]),
+            ("test_captures_00.cor", [41, 44], [[41, 24], [None, None]]),
+            ("test_captures_00.cor", None, [[41, 24], [28, 29]]),
+            ("test_minimax_02.cor", None, [None, None]),
+            ("endgame_07.cor", [47, 46], [[5, 4], [25, 26]]),
+            ("endgame_08.cor", None, [[45, 46], [36, 35]]),
+            ("position_10.cor", None, [[0, 1], None])
+        )
+
+        rng = np.random.default_rng(0)
+        # Loop over all test cases.
+        for test in test_cases:
+            file_name, hash_move, killer_moves = test
+
+            # Moves expected: legal moves but hash_move, sorted.
+            board = bd.Board(GAMES_PATH + file_name)
+            moves, moves_count = gp.generate_legal_moves(board)
+            moves = [move for move in moves if move != hash_move]
+            expected_moves = gp.pre_evaluate_pseudomoves(
+                board, moves, killer_moves
+                )
+
+            # Moves yielded by stages.
+            moves = list(gp.pick_moves(board, hash_move, killer_moves))
+
+            # Check results.
+            self.assertTrue(
+                np.array_equal(
+                    np.array(moves), np.array(expected_moves)
+                ),
+                "Error found in position {} with killer moves {}".format(
+                    file_name, killer_moves)
+            )
+
+            # Same order with non captures sorted by history.
+            history_table = gp.History_table()
+            history_table.table[:] = rng.integers(
+                0, 4, history_table.table.shape
+            )
+            moves, moves_count = gp.generate_legal_moves(board)
+            moves = [move for move in moves if move != hash_move]
+            expected_moves = gp.pre_evaluate_pseudomoves(
+                board, moves, killer_moves, history_table
+                )
+            moves = list(gp.pick_moves(
+                board, hash_move, killer_moves, history_table
+            ))
+            self.assertTrue(
+                np.array_equal(
+                    np.array(moves), np.array(expected_moves)
+                ),
+                "Error found in position {} with history".format(file_name)
+            )
+
+            # Same order with countermove and follow-up move, taken
+            # from the legal moves (or repeating a killer move).
+            c_moves = [moves[-1] if moves else None, killer_moves[1]]
+            moves, moves_count = gp.generate_legal_moves(board)
+            moves = [move for move in moves if move != hash_move]
+            expected_moves = gp.pre_evaluate_pseudomoves(
+                board, moves, killer_moves, history_table, c_moves
+                )
+            moves = list(gp.pick_moves(
+                board, hash_move, killer_moves, history_table, c_moves
+            ))
+            self.assertTrue(
+                np.array_equal(
+                    np.array(moves), np.array(expected_moves)
+                ),
+                "Error found in position {} with countermoves {}".format(
+                    file_name, c_moves)
+            )
+
+            # Same order with captures valued by SEE.
+            moves, moves_count = gp.generate_legal_moves(board)
+            moves = [move for move in moves if move != hash_move]
+            expected_moves = gp.pre_evaluate_pseudomoves(
+                board, moves, killer_moves, history_table, c_moves, see=True
+                )
+            moves = list(gp.pick_moves(
+                board, hash_move, killer_moves, history_table, c_moves,
+                see=True
+            ))
+            self.assertTrue(
+                np.array_equal(
+                    np.array(moves), np.array(expected_moves)
+                ),
+                "Error found in position {} with SEE".format(file_name)
+            )
+
+    def test_static_exchange_evaluation(self):
+        # Test cases: position, capture, expected balance.
+        test_cases = (
+            ("test_captures_00.cor", [41, 37], -9),  # Recaptured.
+            ("test_captures_00.cor", [41, 44], 1),  # Not defended.
+            ("test_captures_00.cor", [1, 2], 9),
+            ("test_captures_00.cor", [28, 29], 1)  # Recapture loses.
+        )
+        for file_name, move, expected_gain in test_cases:
+            board = bd.Board(GAMES_PATH + file_name)
+            self.assertEqual(
+                gp.static_exchange_evaluation(board, *move), expected_gain,
+                "Error found in position {}, move {}".format(file_name, move)
+            )
+
     def test_knights_mobility(self):
         # file_list = glob.glob(GAMES_PATH + "position1.cor")
         file_list = [
@@ -655,6 +832,152 @@ class Test_gameplay(unittest.TestCase):
                 )
             )
 
+    def test_transposition_table(self):
+        # Size: 1 MB -> 2^14 buckets of 2 entries of 24 bytes.
+        t_table = gp.Transposition_table(1)
+        self.assertEqual(t_table.size, 2**15)
+        self.assertEqual(t_table.mask, 2**14 - 1)
+        # Moves are packed and unpacked (incl. Prince leaving / no move).
+        key_1 = 0xFEDCBA9876543210
+        for move in ([24, 14], [12, None], None):
+            t_table.insert(key_1, (key_1, 3, -0.25, gp.LOWER_BOUND, move, 2))
+            self.assertEqual(
+                t_table.retrieve(key_1),
+                (key_1, 3, -0.25, gp.LOWER_BOUND, move, 2)
+            )
+        self.assertIsNone(t_table.retrieve(key_1 ^ 1))
+        # Same bucket: a shallower search doesn't replace the deeper one,
+        # but goes to the always-replace entry.
+        key_2 = key_1 + (1 << 40)
+        key_3 = key_1 + (2 << 40)
+        t_table.insert(key_1, (key_1, 3, 1.0, gp.EXACT, [1, 2], 1))
+        self.assertEqual(t_table.retrieve(key_1)[gp.DEPTH_SRCH_IDX], 2)
+        t_table.insert(key_2, (key_2, 3, 1.0, gp.EXACT, [1, 2], 1))
+        t_table.insert(key_3, (key_3, 3, 2.0, gp.EXACT, [1, 3], 1))
+        self.assertIsNotNone(t_table.retrieve(key_1))
+        self.assertIsNone(t_table.retrieve(key_2))
+        self.assertEqual(t_table.retrieve(key_3)[gp.VALUE_IDX], 2.0)
+        # A deeper search replaces the depth-preferred entry.
+        t_table.insert(key_2, (key_2, 3, 3.0, gp.EXACT, [1, 2], 5))
+        self.assertIsNone(t_table.retrieve(key_1))
+        self.assertEqual(t_table.retrieve(key_2)[gp.VALUE_IDX], 3.0)
+        # Metrics: size, used, hits, collisions, updates.
+        self.assertEqual(t_table.metrics()[:2], (2**15, 2))
+        t_table.clear()
+        self.assertEqual(t_table.metrics(), (2**15, 0, 0, 0, 0))
+        self.assertIsNone(t_table.retrieve(key_2))
+        # Aging: a deeper entry from a previous search is replaced,
+        # unless it was used (retrieved) in the current one.
+        t_table.insert(key_1, (key_1, 0, 1.0, gp.EXACT, [1, 2], 5))
+        t_table.new_search()
+        t_table.insert(key_2, (key_2, 0, 2.0, gp.EXACT, [1, 2], 1))
+        self.assertIsNone(t_table.retrieve(key_1))
+        self.assertEqual(t_table.retrieve(key_2)[gp.DEPTH_SRCH_IDX], 1)
+        t_table.insert(key_1, (key_1, 0, 1.0, gp.EXACT, [1, 2], 5))
+        t_table.new_search()
+        self.assertIsNotNone(t_table.retrieve(key_1))
+        t_table.insert(key_3, (key_3, 0, 3.0, gp.EXACT, [1, 2], 1))
+        self.assertEqual(t_table.retrieve(key_1)[gp.DEPTH_SRCH_IDX], 5)
+        self.assertIsNotNone(t_table.retrieve(key_3))
+        # Size taken from search parameters.
+        t_table = gp.create_transposition_table({"tt_size_mb": 2})
+        self.assertEqual(t_table.size, 2**16)
+
+    def test_shared_transposition_table(self):
+        t_table = gp.Shared_transposition_table(1)
+        self.assertEqual(t_table.size, 2**15)
+        key_1 = 0xFEDCBA9876543210
+        for move in ([24, 14], [12, None], None):
+            t_table.insert(key_1, (key_1, 3, -0.25, gp.LOWER_BOUND, move, 2))
+            self.assertEqual(
+                t_table.retrieve(key_1),
+                (key_1, 3, -0.25, gp.LOWER_BOUND, move, 2)
+            )
+        self.assertIsNone(t_table.retrieve(key_1 ^ 1))
+        # Attached in another process (passed by pickling).
+        key_2 = key_1 + 1
+        process = multiprocessing.Process(
+            target=insert_in_shared_table, args=(t_table, key_2)
+        )
+        process.start()
+        process.join()
+        self.assertEqual(
+            t_table.retrieve(key_2),
+            (key_2, 1, 0.5, gp.EXACT, [2, 3], 4)
+        )
+        self.assertEqual(t_table.metrics()[:2], (2**15, 2))
+        # Attached in this process: same data, same generation.
+        t_table.new_search()
+        t_table_2 = pickle.loads(pickle.dumps(t_table))
+        self.assertEqual(t_table_2.generation, 1)
+        self.assertIsNotNone(t_table_2.retrieve(key_1))
+        # A corrupted (e.g. half-written) entry is ignored.
+        index = key_2 & t_table.mask
+        t_table.table[index, 0, 1] ^= np.uint64(1)
+        self.assertIsNone(t_table_2.retrieve(key_2))
+        t_table_2.close()
+        t_table.clear()
+        self.assertEqual(t_table.metrics(), (2**15, 0, 0, 0, 0))
+        t_table.close()
+
+    def test_history_table(self):
+        history_table = gp.History_table()
+        history_table.insert(bd.WHITE, [21, 19], 3)
+        history_table.insert(bd.WHITE, [21, 19], 2)
+        history_table.insert(bd.BLACK, [12, 11], 1)
+        self.assertEqual(history_table.table[bd.WHITE, 21, 19], 13)
+        self.assertEqual(history_table.table[bd.BLACK, 12, 11], 1)
+        self.assertEqual(history_table.table[bd.BLACK, 21, 19], 0)
+        # Non captures sorted by history.
+        board = bd.Board(GAMES_PATH + "initial_position.cor")
+        moves, _ = gp.generate_legal_moves(board)
+        moves = gp.pre_evaluate_pseudomoves(
+            board, moves, history_table=history_table
+        )
+        self.assertEqual(moves[0].tolist(), [21, 19])
+        # Aging.
+        history_table.age()
+        self.assertEqual(history_table.table[bd.WHITE, 21, 19], 6)
+        self.assertEqual(history_table.table[bd.BLACK, 12, 11], 0)
+        # All values halved when one exceeds the maximum.
+        history_table.insert(bd.WHITE, [1, 2], 1025)
+        self.assertLessEqual(history_table.table.max(), gp.HISTORY_MAX)
+        self.assertEqual(history_table.table[bd.WHITE, 21, 19], 3)
+
+    def test_countermove_table(self):
+        countermove_table = gp.Countermove_table()
+        self.assertEqual(
+            countermove_table.retrieve(bd.WHITE, []), [None, None]
+        )
+        # A cutoff after [12, 11] and, before that, [21, 19].
+        search_trace = [[21, 19], [12, 11]]
+        countermove_table.insert(bd.WHITE, search_trace, [19, 18])
+        self.assertEqual(
+            countermove_table.retrieve(bd.WHITE, search_trace),
+            [[19, 18], [19, 18]]
+        )
+        self.assertEqual(
+            countermove_table.retrieve(bd.BLACK, search_trace), [None, None]
+        )
+        self.assertEqual(
+            countermove_table.retrieve(bd.WHITE, [[12, 11]]),
+            [[19, 18], None]
+        )
+        # No countermove after a null move.
+        self.assertEqual(
+            countermove_table.retrieve(bd.WHITE, [[21, 19], None]),
+            [None, [19, 18]]
+        )
+        # Hits are counted against the countermove in place.
+        countermove_table.insert(bd.WHITE, search_trace, [19, 18])
+        countermove_table.insert(bd.WHITE, search_trace, [20, 19])
+        self.assertEqual(countermove_table.hits, 1)
+        self.assertEqual(countermove_table.tries, 2)
+        self.assertEqual(
+            countermove_table.retrieve(bd.WHITE, search_trace),
+            [[20, 19], [20, 19]]
+        )
+
     def test_correct_eval_from_to_depth(self):
         # Test cases are:
         # ( evaluation, from_depth, to_depth,
@@ -935,6 +1258,400 @@ class Test_gameplay(unittest.TestCase):
                         (game_end, game_status), (exp_end, exp_status))
                 )
 
+    def test_quiesce_delta_pruning(self):
+        # Knight x Soldier at d4 can't raise alpha (well above the static
+        # evaluation) by material, but it's a check leading to a win, so
+        # it's still searched.
+        board = bd.Board(GAMES_PATH + "test_captures_01.cor")
+        alpha = gp.evaluate_static(board, 0) + 2 * gp.KNIGHT_WEIGHT
+        params = dict(gp.PLY4_SEARCH_PARAMS, delta_pruning=True)
+        best_move, result, _, _ = gp.quiesce(
+            board, 0, alpha, np.Infinity, params,
+            gp.Transposition_table(), None, killer_list=gp.Killer_Moves(),
+            search_trace=[]
+        )
+        self.assertEqual(best_move, [41, 20])
+        self.assertEqual(result, 9983.0)
+
+    def test_quiesce_see_pruning(self):
+        # Knight x Soldier at d4 loses the Knight in the exchange, but it's
+        # a check and the only way to win, so it's still searched.
+        board = bd.Board(GAMES_PATH + "test_captures_01.cor")
+        self.assertLess(gp.static_exchange_evaluation(board, 41, 20), 0)
+        params = dict(gp.PLY4_SEARCH_PARAMS, see=True)
+        best_move, result, _, _ = gp.quiesce(
+            board, 0, -np.Infinity, np.Infinity, params,
+            gp.Transposition_table(), None, killer_list=gp.Killer_Moves(),
+            search_trace=[]
+        )
+        self.assertEqual(best_move, [41, 20])
+        self.assertEqual(result, 9983.0)
+
+    def test_play_workers(self):
+        # Parallel search (Lazy SMP / root split) returns the same as a
+        # single search on positions with a forced outcome.
+        test_cases = (
+            ("position_05.cor", [12, 11], -9976.0),
+            ("endgame_05.cor", [38, 44], 9991.0)
+        )
+        for file_name, expected_move, expected_result in test_cases:
+            board = bd.Board(GAMES_PATH + file_name)
+            for parallel_mode in ("lazy_smp", "root_split"):
+                params = dict(
+                    gp.PLY4_SEARCH_PARAMS, workers=3,
+                    parallel_mode=parallel_mode
+                )
+                search_metrics = {}
+                move, result, game_end, game_status, time_used, \
+                    tt_metrics = gp.play(
+                        board, params, screen_traces=False,
+                        search_metrics=search_metrics
+                    )
+                self.assertEqual(move, expected_move, parallel_mode)
+                self.assertEqual(result, expected_result, parallel_mode)
+                self.assertEqual(search_metrics["pv"][0], move)
+                # The root position is left untouched.
+                self.assertEqual(board.hash, board.calculate_hash())
+
+        # Root split also returns the same as a single search on middle
+        # game positions, where moves are searched in parallel.
+        for file_name in ("position_01.cor", "position_10.cor"):
+            board = bd.Board(GAMES_PATH + file_name)
+            results = [
+                gp.play(
+                    board, dict(
+                        gp.PLY4_SEARCH_PARAMS, workers=workers,
+                        parallel_mode="root_split"
+                    ),
+                    screen_traces=False
+                )[0:2]
+                for workers in (1, 3)
+            ]
+            self.assertEqual(results[1], results[0], file_name)
+            self.assertEqual(board.hash, board.calculate_hash())
+
+    def test_negamax_root_split_cutoff(self):
+        # If the first move fails high, the rest of root moves aren't
+        # split (no executor is needed).
+        board = bd.Board(GAMES_PATH + "position_01.cor")
+        params = dict(gp.PLY4_SEARCH_PARAMS, max_depth=3)
+        move, result, _, _ = gp.negamax(
+            board, 0, -np.Infinity, np.Infinity, params,
+            gp.Transposition_table(), None, gp.Killer_Moves(), []
+        )
+        beta = result - 1
+        move, result, _, _ = gp.negamax_root_split(
+            board, beta - 1, beta, params, gp.Transposition_table(), None,
+            gp.Killer_Moves(), None
+        )
+        self.assertEqual(result, beta)
+        self.assertTrue(gp.is_legal_move(board, move))
+        self.assertEqual(board.hash, board.calculate_hash())
+
+    def test_play_time_limit(self):
+        # A deep search is aborted when time is over, returning a legal
+        # move found in the last completed iteration.
+        board = bd.Board(GAMES_PATH + "initial_position.cor")
+        params = dict(
+            gp.PLY4_SEARCH_PARAMS, max_depth=12, max_check_quiesc_depth=16
+        )
+        move, result, game_end, game_status, time_used, tt_metrics = \
+            gp.play(board, params, max_time=1, screen_traces=False)
+        self.assertLess(time_used, 5)
+        self.assertTrue(gp.is_legal_move(board, move))
+        self.assertFalse(game_end)
+        # The root position is left untouched.
+        self.assertEqual(board.hash, board.calculate_hash())
+
+    def test_play_aspiration_window(self):
+        # Aspiration windows find the same result as full windows,
+        # searching again when failing low / high.
+        board = bd.Board(GAMES_PATH + "position_01.cor")
+        params = dict(gp.PLY4_SEARCH_PARAMS, max_depth=5)
+        search_metrics = {}
+        move, result, _, _, _, _ = gp.play(
+            board, params, screen_traces=False, search_metrics=search_metrics
+        )
+        self.assertEqual(search_metrics["researches"], 0)
+        for window in (0.5, 0.01):
+            params["aspiration_window"] = window
+            results = gp.play(
+                board, params, screen_traces=False,
+                search_metrics=search_metrics
+            )
+            self.assertEqual(len(results), 6)
+            self.assertEqual(results[0], move, window)
+            self.assertEqual(results[1], result, window)
+        # A narrow window fails, and is widened.
+        self.assertGreater(search_metrics["researches"], 0)
+
+    def test_play_principal_variation(self):
+        # The principal variation starts with the move found, and can be
+        # played from the root position.
+        for file_name in ("initial_position.cor", "position_01.cor"):
+            board = bd.Board(GAMES_PATH + file_name)
+            search_metrics = {}
+            move, result, _, _, _, _ = gp.play(
+                board, gp.PLY4_SEARCH_PARAMS, trace=gp.Gametrace(board),
+                screen_traces=False, search_metrics=search_metrics
+            )
+            pv = search_metrics["pv"]
+            self.assertGreater(len(pv), 1, file_name)
+            self.assertEqual(pv[0], move, file_name)
+            made_moves = []
+            for pv_move in pv:
+                self.assertTrue(gp.is_legal_move(board, pv_move), file_name)
+                made_moves.append(pv_move + list(board.make_move(*pv_move)))
+            for coord1, coord2, captured, leaving, old_hash in \
+                    reversed(made_moves):
+                board.unmake_move(coord1, coord2, captured, leaving, old_hash)
+            self.assertEqual(board.hash, board.calculate_hash())
+
+    def test_pv_table(self):
+        pv_table = gp.PV_table(size=4)
+        # Lines are built from the deepest ply up.
+        pv_table.clear(2)
+        pv_table.update(2, [3, 4])
+        pv_table.update(1, [2, 3])
+        pv_table.update(0, [1, 2])
+        self.assertEqual(
+            pv_table.principal_variation([1, 2]), [[1, 2], [2, 3], [3, 4]]
+        )
+        # A move ending the game has no line after it.
+        pv_table.update(1, [5, None], game_end=True)
+        pv_table.update(0, [1, 2])
+        self.assertEqual(
+            pv_table.principal_variation([1, 2]), [[1, 2], [5, None]]
+        )
+        # Only the best move if the root's line is not known.
+        self.assertEqual(pv_table.principal_variation([6, 7]), [[6, 7]])
+        self.assertEqual(pv_table.principal_variation(None), [])
+        # Plies beyond its size are ignored.
+        pv_table.update(4, [8, 9])
+        pv_table.update(3, [7, 8])
+        self.assertEqual(pv_table.lines[3], [[7, 8]])
+        # Last line's moves, only while the search follows it.
+        pv_table.follow([[1, 2], [2, 3], [3, 4]])
+        self.assertEqual(pv_table.pv_move(0, []), [1, 2])
+        self.assertEqual(pv_table.pv_move(2, [[1, 2], [2, 3]]), [3, 4])
+        self.assertIsNone(pv_table.pv_move(2, [[1, 2], None]))
+        self.assertIsNone(pv_table.pv_move(3, [[1, 2], [2, 3], [3, 4]]))
+
+    def test_negamax_pvs(self):
+        # PVS finds the same moves and results as a full-window search,
+        # with fewer nodes.
+        test_cases = (
+            "initial_position.cor", "position_01.cor", "endgame_05.cor"
+        )
+        for file_name in test_cases:
+            board = bd.Board(GAMES_PATH + file_name)
+            nodes = []
+            results = []
+            for pvs in (False, True):
+                trace = gp.Gametrace(board)
+                params = dict(gp.PLY4_SEARCH_PARAMS, pvs=pvs)
+                move, result, _, _ = gp.negamax(
+                    board, 0, -float("inf"), float("inf"), params,
+                    gp.Transposition_table(), trace, gp.Killer_Moves(), []
+                )
+                results.append([move, result])
+                nodes.append(trace.level_trace[:, gp.NODE_COUNT_COL].sum())
+            self.assertEqual(results[0], results[1], file_name)
+            if file_name == "initial_position.cor":
+                self.assertLess(nodes[1], nodes[0])
+
+    def test_negamax_pvs_no_trace(self):
+        # With no Gametrace, quiet moves left in the table by null-window
+        # searches are not replayed endlessly by quiesce() as hash moves.
+        for pvs in (False, True):
+            board = bd.Board(GAMES_PATH + "test_make_pseudomove_04.cor")
+            params = dict(gp.PLY3_SEARCH_PARAMS, pvs=pvs, max_depth=2)
+            move, result, _, _ = gp.negamax(
+                board, 0, -float("inf"), float("inf"), params,
+                gp.Transposition_table(), None, gp.Killer_Moves(), []
+            )
+            self.assertEqual(move, [14, 40], pvs)
+            self.assertAlmostEqual(result, 9.253333333333334, 9, pvs)
+            # The board is left as it was.
+            self.assertEqual(board.hash, board.calculate_hash())
+
+    def test_null_move_allowed(self):
+        # Test cases: position, depth, beta, expected.
+        params = gp.PLY4_SEARCH_PARAMS
+        test_cases = (
+            ("initial_position.cor", 1, 0, True),
+            ("initial_position.cor", 0, 0, False),  # Root.
+            ("initial_position.cor", 1, float("inf"), False),
+            ("initial_position.cor", 2, 0, False),  # Not enough depth.
+            ("test_make_pseudomove_12.cor", 1, 0, False),  # In check.
+            ("position_01.cor", 1, 0, False)  # Only Prince and Soldiers.
+        )
+        for file_name, depth, beta, expected in test_cases:
+            board = bd.Board(GAMES_PATH + file_name)
+            self.assertEqual(
+                gp.null_move_allowed(board, depth, beta, params, [[0, 1]]),
+                expected, f"{file_name}, depth {depth}"
+            )
+        # Not after another null move.
+        board = bd.Board(GAMES_PATH + "initial_position.cor")
+        self.assertFalse(gp.null_move_allowed(board, 1, 0, params, [None]))
+
+    def test_negamax_null_move(self):
+        # Black's node after [21, 19], searched at depth 1 with a null
+        # window. Test cases: beta, null move, expected result, nodes
+        # searched at levels 2 and 3.
+        test_cases = (
+            # Passing still fails high: cutoff after the null child alone.
+            (-2.0, True, (None, -2.0, False, gp.ON_GOING), 1, 0),
+            (-2.0, False, ([0, 1], -2.0, False, gp.ON_GOING), 1, 28),
+            # Passing fails low: the null child is searched in vain.
+            (-1.0, True, ([2, 3], -1.0, False, gp.ON_GOING), 4, 40),
+            (-1.0, False, ([2, 3], -1.0, False, gp.ON_GOING), 3, 40)
+        )
+        for beta, null_move, expected, nodes_2, nodes_3 in test_cases:
+            board = bd.Board(GAMES_PATH + "initial_position.cor")
+            trace = gp.Gametrace(board)
+            board.make_move(21, 19)
+            params = dict(gp.PLY4_SEARCH_PARAMS, null_move=null_move)
+            result = gp.negamax(
+                board, 1, beta - gp.PVS_EPSILON, beta, params,
+                gp.Transposition_table(), trace, gp.Killer_Moves(),
+                [[21, 19]]
+            )
+            case = f"beta {beta}, null move {null_move}"
+            self.assertEqual(result, expected, case)
+            self.assertEqual(
+                list(trace.level_trace[2:4, gp.NODE_COUNT_COL]),
+                [nodes_2, nodes_3], case
+            )
+            # The board is left as it was.
+            self.assertEqual(board.hash, board.calculate_hash())
+
+    def test_is_quiet_move(self):
+        # Test cases: position, move, expected.
+        test_cases = (
+            ("initial_position.cor", [21, 19], True),
+            ("initial_position.cor", [32, 31], True),  # Soldier, same dist.
+            ("initial_position.cor", [32, 39], False),  # Soldier to crown.
+            ("endgame_07.cor", [47, 43], True),  # Prince away from crown.
+            ("test_make_pseudomove_01.cor", [38, 11], True),
+            ("test_make_pseudomove_01.cor", [21, 20], False),  # To crown.
+            ("test_make_pseudomove_01.cor", [38, 17], False),  # Capture.
+            ("test_make_pseudomove_01.cor", [38, 33], False)  # Check.
+        )
+        for file_name, move, expected in test_cases:
+            board = bd.Board(GAMES_PATH + file_name)
+            coord1, coord2 = move
+            captured_piece, leaving_piece, old_hash = \
+                board.make_move(coord1, coord2)
+            self.assertEqual(
+                gp.is_quiet_move(
+                    board, coord1, coord2, captured_piece, leaving_piece
+                ),
+                expected, f"{file_name}, {move}"
+            )
+            board.unmake_move(
+                coord1, coord2, captured_piece, leaving_piece, old_hash)
+
+    def test_negamax_lmr(self):
+        # The best move is a late quiet one: reduced, it beats alpha,
+        # and only its re-search at full depth gives the exact result
+        # (the reduced search is just a null-window bound).
+        test_cases = (
+            ("endgame_13.cor", [43, 42], -0.3416666666666661),
+            ("strategy_07.cor", [28, 27], 1.296666666666666)
+        )
+        for file_name, expected_move, expected_result in test_cases:
+            board = bd.Board(GAMES_PATH + file_name)
+            for lmr_reduction in (0, 1):
+                trace = gp.Gametrace(board)
+                params = dict(
+                    gp.PLY4_SEARCH_PARAMS, lmr_reduction=lmr_reduction
+                )
+                move, result, _, _ = gp.negamax(
+                    board, 0, -float("inf"), float("inf"), params,
+                    gp.Transposition_table(), trace, gp.Killer_Moves(), []
+                )
+                self.assertEqual(move, expected_move, file_name)
+                self.assertAlmostEqual(
+                    result, expected_result, 9, file_name
+                )
+            # The board is left as it was.
+            self.assertEqual(board.hash, board.calculate_hash())
+
+    def test_negamax_futility(self):
+        # Black's frontier node after [21, 19] (one ply left), with alpha
+        # beyond the reach of any quiet move: with futility pruning, its
+        # 16 quiet moves are skipped and only the Prince and Soldier
+        # moves towards the crown, [0, 1] and [24, 33], are searched.
+        for futility_pruning, expected_children in ((False, 18), (True, 2)):
+            board = bd.Board(GAMES_PATH + "initial_position.cor")
+            trace = gp.Gametrace(board)
+            board.make_move(21, 19)
+            alpha = gp.evaluate_static(board, 3) + gp.FUTILITY_MARGIN + 0.5
+            params = dict(
+                gp.PLY4_SEARCH_PARAMS, futility_pruning=futility_pruning
+            )
+            move, result, _, _ = gp.negamax(
+                board, 3, alpha, alpha + gp.PVS_EPSILON, params,
+                gp.Transposition_table(), trace, gp.Killer_Moves(),
+                [[0, 1], [1, 0], [21, 19]]
+            )
+            # Fail-hard: no move beats alpha either way.
+            self.assertEqual(result, alpha, futility_pruning)
+            self.assertEqual(
+                trace.level_trace[4, gp.NODE_COUNT_COL], expected_children,
+                futility_pruning
+            )
+            # The board is left as it was.
+            self.assertEqual(board.hash, board.calculate_hash())
+
+    def test_static_exchange_sequence(self):
+        # Exchanges on d4 with White's Soldier d3 and Knights d2 (behind
+        # d3) and f3 against Black's Soldier d5 and Knight d6 (behind d5).
+        # Test cases: position, capture, expected balance.
+        test_cases = (
+            # Sxk: Black's recapture would lose, as White keeps the last
+            # capture with the Knights.
+            ("test_captures_02.cor", [19, 20], 10),
+            # Kxk sxK Sxs: +10 -10 +1, where Black stops (kxS would lose
+            # the Knight to Kxk).
+            ("test_captures_02.cor", [23, 20], 1),
+            # Sxs: again no recapture pays off for Black.
+            ("test_captures_03.cor", [19, 20], 1),
+            # Kxs sxK Sxs: +1 -10 +1, where Black stops again.
+            ("test_captures_03.cor", [23, 20], -8)
+        )
+        for file_name, move, expected_gain in test_cases:
+            board = bd.Board(GAMES_PATH + file_name)
+            self.assertEqual(
+                gp.static_exchange_evaluation(board, *move), expected_gain,
+                "Error found in position {}, move {}".format(file_name, move)
+            )
+
+    def test_end_scores(self):
+        # End scores encode the depth of the game end.
+        self.assertTrue(gp.is_end_score(gp.PLAYER_WINS - 9))
+        self.assertTrue(gp.is_end_score(gp.OPPONENT_WINS + 4))
+        self.assertFalse(gp.is_end_score(gp.KNIGHT_WEIGHT * 9))
+        self.assertEqual(gp.plies_to_end(gp.PLAYER_WINS - 9, 4), 5)
+        self.assertEqual(gp.plies_to_end(gp.OPPONENT_WINS + 6, 6), 0)
+        self.assertIsNone(gp.plies_to_end(0.5, 2))
+        # Mate-distance pruning: a node at depth 3 can't beat a win at 2.
+        self.assertEqual(
+            gp.mate_distance_window(-float("inf"), float("inf"), 3),
+            (gp.OPPONENT_WINS + 3, gp.PLAYER_WINS - 3)
+        )
+        alpha, beta = gp.mate_distance_window(gp.PLAYER_WINS - 2, 9999, 3)
+        self.assertGreaterEqual(alpha, beta)
+        board = bd.Board(GAMES_PATH + "test_minimax_10b.cor")
+        move, result, _, _ = gp.negamax(
+            board, 3, gp.PLAYER_WINS - 2, float("inf"),
+            gp.PLY4_SEARCH_PARAMS, gp.Transposition_table(), None,
+            gp.Killer_Moves(), []
+        )
+        self.assertEqual((move, result), (None, gp.PLAYER_WINS - 2))
+
     def test_negamax(self):
         # Definition of test cases to run:
         # - File to load.
@@ -1252,5 +1969,10 @@ class Test_gameplay(unittest.TestCase):
             )
 
 
+def insert_in_shared_table(t_table, key):
+    # Insert an entry from another process.
+    t_table.insert(key, (key, 1, 0.5, gp.EXACT, [2, 3], 4))
+
+
 if __name__ == '__main__':
     unittest.main()
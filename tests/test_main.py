@@ -0,0 +1,62 @@
+# Standard library imports
+import unittest
+from os.path import dirname, realpath
+
+# Local application imports
+import thecrown.board as bd
+import thecrown.main as mn
+
+# Location of saved games.
+dir_path = dirname(dirname(realpath(__file__)))
+GAMES_PATH = dir_path + "/thecrown/games/"
+
+
+class Test_main(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    def test_parse_timing(self):
+        test_cases = (
+            (None, None),
+            ("", None),
+            ("move:5", ("move", 5.0, 0.0)),
+            (5.0, ("move", 5.0, 0.0)),  # As read from a .csv file.
+            ("game:300", ("game", 300.0, 0.0)),
+            ("Game:300+2", ("game", 300.0, 2.0))
+        )
+        for timing, expected in test_cases:
+            self.assertEqual(mn.parse_timing(timing), expected, timing)
+        for timing in ("move", "move:5+1", "hour:1", "game:-3", "game:x+2"):
+            with self.assertRaises(ValueError, msg=timing):
+                mn.parse_timing(timing)
+
+    def test_allocate_move_time(self):
+        opening = bd.Board(GAMES_PATH + "initial_position.cor")
+        endgame = bd.Board(GAMES_PATH + "endgame_05.cor")
+        # No limit, or fixed per move.
+        self.assertEqual(
+            mn.allocate_move_time(None, float("inf"), opening), float("inf")
+        )
+        self.assertEqual(
+            mn.allocate_move_time(mn.parse_timing("move:5"), 0, opening), 5
+        )
+        # Sudden death: more time per move with fewer pieces left.
+        time_control = mn.parse_timing("game:300")
+        opening_time = mn.allocate_move_time(time_control, 300, opening)
+        endgame_time = mn.allocate_move_time(time_control, 300, endgame)
+        self.assertLess(opening_time, endgame_time)
+        self.assertLessEqual(endgame_time, 300 * mn.MAX_CLOCK_SHARE)
+        # The increment is added, and some time is always left to move.
+        time_control = mn.parse_timing("game:300+2")
+        self.assertEqual(
+            mn.allocate_move_time(time_control, 300, opening),
+            opening_time + 2
+        )
+        self.assertEqual(
+            mn.allocate_move_time(time_control, -1, opening),
+            mn.MIN_MOVE_TIME
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+# Standard library imports
+import unittest
+from os.path import dirname, realpath
+
+# Local application imports
+import thecrown.board as bd
+import thecrown.gameplay as gp
+import thecrown.perft as pf
+
+# Location of saved games.
+dir_path = dirname(dirname(realpath(__file__)))
+GAMES_PATH = dir_path + "/thecrown/games/"
+
+
+class Test_perft(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    def test_perft(self):
+        # Test cases: position, leaf nodes at depths 1, 2, 3.
+        test_cases = (
+            ("initial_position.cor", [18, 324, 6443]),
+            ("position_01.cor", [14, 140, 1640]),
+            ("endgame_07.cor", [7, 77, 598]),
+            ("game_record_5A2020.cor", [1, 25, 464]),  # Prince leaving.
+            ("test_minimax_01.cor", [0, 0, 0])  # Ended game.
+        )
+        for file_name, expected_nodes in test_cases:
+            board = bd.Board(GAMES_PATH + file_name)
+            for depth, expected in enumerate(expected_nodes, start=1):
+                # Bulk counting, making every move, and cached.
+                self.assertEqual(
+                    pf.perft(board, depth), expected,
+                    f"Error found in position {file_name}, depth {depth}")
+                self.assertEqual(
+                    pf.perft(board, depth, bulk_counting=False), expected,
+                    f"Error found in position {file_name}, depth {depth}")
+                self.assertEqual(
+                    pf.perft(board, depth, gp.Transposition_table()),
+                    expected,
+                    f"Error found in position {file_name}, depth {depth}")
+
+    def test_perft_divide(self):
+        board = bd.Board(GAMES_PATH + "strategy_01.cor")
+        divide = pf.perft_divide(board, 3)
+        # Each legal move once, adding up to perft.
+        legal_moves, legal_count = gp.generate_legal_moves(board)
+        self.assertEqual(len(divide), legal_count)
+        self.assertEqual(
+            sorted([move for move, _ in divide]), sorted(legal_moves))
+        self.assertEqual(sum([nodes for _, nodes in divide]), 9076)
+        # The board is left as it was.
+        self.assertEqual(board.hash, board.calculate_hash())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,7 +4,6 @@
 
 # Standard library imports
 import sys
-import types
 import numpy as np
 
 # Local application imports
@@ -49,6 +48,8 @@ initial_position = (
 # Calculate auxiliary tables:
 coord1to3 = ut.calculate_coord1to3(N_ROWS)
 kingdoms = ut.calculate_kingdoms(N_POSITIONS)
+# Zobrist keys: zobrist_piece[color][type][coord], zobrist_black_turn.
+zobrist_piece, zobrist_black_turn = ut.calculate_zobrist_keys(N_POSITIONS)
 
 # Load precalculated tables:
 
@@ -105,6 +106,57 @@ piece_moves_flat = (
     (knight_moves_flat, knight_moves_flat)
 )
 
+# Bitboards: each set of coordinates as an int with bit 'c' for coord 'c'.
+coord_bit = ut.calculate_coord_bits(N_POSITIONS)
+# Bitboard with all destinations of each move table.
+simple_moves_mask = ut.calculate_moves_masks(simple_moves)
+soldier_moves_mask = (
+    ut.calculate_moves_masks(soldier_moves[0]),
+    ut.calculate_moves_masks(soldier_moves[1])
+)
+knight_moves_mask = ut.calculate_moves_masks(knight_moves)
+# Tables with the coords reached along rays for any occupancy
+# (None for coords with a plain list of moves).
+simple_reach = ut.calculate_reach_tables(simple_moves)
+soldier_reach = (
+    ut.calculate_reach_tables(soldier_moves[0]),
+    ut.calculate_reach_tables(soldier_moves[1])
+)
+knight_reach = ut.calculate_reach_tables(knight_moves)
+# Max. occupancies kept in each coord's cache of rays_reach() results.
+# (Full tables would need up to 2^21 entries for a Knight's coord.)
+RAYS_CACHE_SIZE = 4096
+
+# Use: piece_moves_mask[piece.type][piece.color][piece.coord]
+piece_moves_mask = (
+    (simple_moves_mask, simple_moves_mask),
+    (soldier_moves_mask[0], soldier_moves_mask[1]),
+    (knight_moves_mask, knight_moves_mask)
+)
+# Use: piece_reach[piece.type][piece.color][piece.coord]
+piece_reach = (
+    (simple_reach, simple_reach),
+    (soldier_reach[0], soldier_reach[1]),
+    (knight_reach, knight_reach)
+)
+
+# Double steps of Soldiers from their kingdom reaching each coord.
+# Use: soldier_jumps[color][coord] -> ((<step bit>, <Soldier bit>), ...)
+soldier_jumps = ut.calculate_soldier_jumps(knight_moves, kingdoms)
+# Use: soldier_jumps_mask[color][coord] -> bitboard of those Soldiers' coords.
+soldier_jumps_mask = tuple(
+    tuple(
+        sum({jump_bit for step_bit, jump_bit in jumps})  # Distinct bits.
+        for jumps in soldier_jumps[color]
+    )
+    for color in (WHITE, BLACK)
+)
+
+# Coords strictly between two coords on a ray: between_mask[coord1][coord2]
+between_mask = ut.calculate_between_masks(knight_moves, N_POSITIONS)
+# Bitboard with all coords.
+ALL_COORDS_MASK = (1 << N_POSITIONS) - 1
+
 
 # UNIQUE CODES for each piece type and color.
 # Order: Prince, Soldier, Knight
@@ -120,6 +172,59 @@ piece_moves_by_code = (
 """
 
 
+def rays_reach(reach_table, occupied):
+    """
+    Obtain the coords reached along some rays till the first occupied coord.
+
+    Input:
+        reach_table:tuple - the rays of a piece from a coord, as in
+                    piece_reach[type][color][coord].
+        occupied:   int - bitboard of all occupied coords.
+
+    Output:
+        reach:      int - bitboard of the coords reached, INcluding
+                    the first occupied coord found on each ray.
+    """
+    inner_mask, ray_tables, cache = reach_table
+    occupancy = occupied & inner_mask
+    reach = cache.get(occupancy)
+    if reach is None:
+        # New occupancy for these rays: join the reach of each ray.
+        reach = 0
+        for ray_inner_mask, ray_reach_table in ray_tables:
+            reach |= ray_reach_table[occupancy & ray_inner_mask]
+        if len(cache) >= RAYS_CACHE_SIZE:
+            # Keep the cache bounded: start it over.
+            cache.clear()
+        cache[occupancy] = reach
+    return reach
+
+
+class Piece:
+    """
+    A piece on the board: type, color, current coord, code (piece_code or
+    0 for tracing pieces) and its index in Board.pieces[color], so that it
+    can be removed from there in O(1).
+    """
+    __slots__ = ("type", "color", "coord", "code", "tracing", "index")
+
+    def __init__(self, type, color, coord, code, tracing=False):
+        self.type = type
+        self.color = color
+        self.coord = coord
+        self.code = code
+        self.tracing = tracing
+        self.index = None  # Not in any Board.pieces list yet.
+
+    def __eq__(self, other):
+        # Same piece features (as with the former SimpleNamespace pieces).
+        return isinstance(other, Piece) and \
+            (self.type, self.color, self.coord, self.code, self.tracing) == \
+            (other.type, other.color, other.coord, other.code, other.tracing)
+
+    __hash__ = None  # Mutable, so not hashable.
+
+
 class Board:
     def __init__(self, file_name=None):
         # Generic boaard info.
@@ -133,12 +238,23 @@ class Board:
         # 2 sides, 3 piece types.
         self.piece_count = np.zeros((2, 3), dtype=int)
         self.prince = [None, None]  # List with the Prince of each side.
+        # Bitboards of the coords occupied by each side, and by each
+        # side and piece type: piece_mask[color][type].
+        self.color_mask = [0, 0]
+        self.piece_mask = [[0, 0, 0], [0, 0, 0]]
+        # Bitboards of the coords attacked by each side (None if not
+        # calculated yet for the current position; see attack_map()),
+        # and those of the positions before each move made.
+        self.attack_maps = [None, None]
+        self.attack_maps_stack = []
 
         # References to the pieces from board coordinates.
         self.board1d = np.full((self.n_positions), None)
         # Board view by content (piece.code value or 0 for empty).
         # Positions + turn.
         self.boardcode = np.zeros(self.n_positions + 1, dtype=int)
+        # Zobrist hash of the position, updated with every change.
+        self.hash = 0
 
         # Set position and sides.
         self.load_board(file_name)
@@ -193,16 +309,19 @@ class Board:
                 )
         # Create the piece.
         code_to_use = 0 if tracing else piece_code[color][type]
-        piece = types.SimpleNamespace(
-            type=type, color=color, coord=coord,
-            code=code_to_use, tracing=tracing)
+        piece = Piece(type, color, coord, code_to_use, tracing)
         # Update board references.
+        piece.index = len(self.pieces[color])
         self.pieces[color].append(piece)
         self.board1d[coord] = piece
         self.boardcode[coord] = piece.code
         # Update piece counts (unless just tracing for testing purposes).
         if not piece.tracing:
             self.piece_count[color][type] += 1
+            self.color_mask[color] |= coord_bit[coord]
+            self.piece_mask[color][type] |= coord_bit[coord]
+            self.hash ^= zobrist_piece[color][type][coord]
+            self.attack_maps[WHITE] = self.attack_maps[BLACK] = None
         # If it's a Prince, update Princes' list.
         if type == PRINCE:
             if self.prince[color] is None:
@@ -228,12 +347,17 @@ class Board:
         color = piece.color
         # Update piece's coord and board references.
         piece.coord = coord
+        piece.index = len(self.pieces[color])
         self.pieces[color].append(piece)
         self.board1d[coord] = piece
         self.boardcode[coord] = piece.code
         # Update piece counts (unless just tracing for testing purposes).
         if not piece.tracing:
             self.piece_count[color][type] += 1
+            self.color_mask[color] |= coord_bit[coord]
+            self.piece_mask[color][type] |= coord_bit[coord]
+            self.hash ^= zobrist_piece[color][type][coord]
+            self.attack_maps[WHITE] = self.attack_maps[BLACK] = None
         # If it's a Prince, update Princes' list.
         if type == PRINCE:
             self.prince[color] = piece
@@ -245,19 +369,79 @@ class Board:
         """
         # Identify the piece.
         piece = self.board1d[coord]
-        # Update board references.
-        self.pieces[piece.color].remove(piece)
+        # Update board references: the last piece in the list
+        # takes the slot of the removed one.
+        side_pieces = self.pieces[piece.color]
+        last_piece = side_pieces.pop()
+        if last_piece is not piece:
+            side_pieces[piece.index] = last_piece
+            last_piece.index = piece.index
+        piece.index = None
         self.board1d[coord] = None
         self.boardcode[coord] = 0
         # Update piece counts.
         if not piece.tracing:
             self.piece_count[piece.color][piece.type] -= 1
+            self.color_mask[piece.color] &= ~coord_bit[coord]
+            self.piece_mask[piece.color][piece.type] &= ~coord_bit[coord]
+            self.hash ^= zobrist_piece[piece.color][piece.type][coord]
+            self.attack_maps[WHITE] = self.attack_maps[BLACK] = None
         # If it's a Prince, update Princes' list.
         if piece.type == PRINCE:
             # Remove reference only if it's the legitimate Prince.
             if self.prince[piece.color] == piece:
                 self.prince[piece.color] = None
 
+    def promote_soldier(self, coord):
+        """
+        Turns the Soldier in the coord given into a Prince of its side,
+        updating all attributes. The same piece is kept, so that
+        promotions during search don't create new objects.
+        """
+        piece = self.board1d[coord]
+        color = piece.color
+        bit = coord_bit[coord]
+        # Update piece counts, bitboards and hash.
+        self.piece_count[color][SOLDIER] -= 1
+        self.piece_count[color][PRINCE] += 1
+        self.piece_mask[color][SOLDIER] &= ~bit
+        self.piece_mask[color][PRINCE] |= bit
+        self.hash ^= zobrist_piece[color][SOLDIER][coord] \
+            ^ zobrist_piece[color][PRINCE][coord]
+        self.attack_maps[WHITE] = self.attack_maps[BLACK] = None
+        # Change the piece.
+        piece.type = PRINCE
+        piece.code = piece_code[color][PRINCE]
+        self.boardcode[coord] = piece.code
+        # Update Princes' list, unless it's a second Prince for that color
+        # (see include_new_piece()).
+        if self.prince[color] is None:
+            self.prince[color] = piece
+
+    def demote_prince(self, coord):
+        """
+        Turns a Prince just promoted in the coord given back into a Soldier,
+        updating all attributes.
+        """
+        piece = self.board1d[coord]
+        color = piece.color
+        bit = coord_bit[coord]
+        # Update piece counts, bitboards and hash.
+        self.piece_count[color][PRINCE] -= 1
+        self.piece_count[color][SOLDIER] += 1
+        self.piece_mask[color][PRINCE] &= ~bit
+        self.piece_mask[color][SOLDIER] |= bit
+        self.hash ^= zobrist_piece[color][PRINCE][coord] \
+            ^ zobrist_piece[color][SOLDIER][coord]
+        self.attack_maps[WHITE] = self.attack_maps[BLACK] = None
+        # Change the piece.
+        piece.type = SOLDIER
+        piece.code = piece_code[color][SOLDIER]
+        self.boardcode[coord] = piece.code
+        # Remove reference only if it's the legitimate Prince.
+        if self.prince[color] is piece:
+            self.prince[color] = None
+
     def make_move(self, coord1, coord2):
         """
         Execute all board updates required for a move from coord1 to coord2,
@@ -275,12 +459,15 @@ class Board:
             leaving_piece:  Piece - Playing piece that left the board,
                             (or None):
                             a) Prince checkmated.
-                            b) Soldier promoted to Prince.
+                            b) Soldier promoted to Prince (the same piece,
+                               now of type PRINCE).
             old_hash:       int - hash value of the board BEFORE the move.
 
         """
-        # Keep old_hash before changes.
+        # Keep old_hash and attack maps before changes.
         old_hash = self.hash
+        self.attack_maps_stack.append(self.attack_maps)
+        self.attack_maps = [None, None]
         # Obtain moving piece.
         piece1 = self.board1d[coord1]
         # Captured piece and leaving piece to detect:
@@ -309,13 +496,17 @@ class Board:
             piece1.coord = coord2
             self.board1d[coord2] = piece1
             self.boardcode[coord2] = piece_code[piece1.color][piece1.type]
+            move_bits = coord_bit[coord1] | coord_bit[coord2]
+            self.color_mask[piece1.color] ^= move_bits
+            self.piece_mask[piece1.color][piece1.type] ^= move_bits
+            self.hash ^= zobrist_piece[piece1.color][piece1.type][coord1] \
+                ^ zobrist_piece[piece1.color][piece1.type][coord2]
             # Manage possible Soldier's promotion.
             if coord2 == self.prince_position[piece1.color] and \
                piece1.type == SOLDIER:
                 # A Soldier is promoted to Prince.
                 leaving_piece = piece1
-                self.remove_piece(coord2)
-                self.include_new_piece(PRINCE, self.turn, coord2)
+                self.promote_soldier(coord2)
         else:
             # A checkmated Prince in coord1 must leave.
             assert piece1.type == PRINCE, \
@@ -324,14 +515,11 @@ class Board:
             leaving_piece = piece1
             self.remove_piece(coord1)
 
-        # Change turns.
+        # Change turns (the hash has been updated along with every change).
         self.flip_turn()
         # self.turn = WHITE if self.turn == BLACK else BLACK
         # self.boardcode[self.n_positions] = self.turn
 
-        # Finally, refresh the board's hash.
-        self.hash = self.calculate_hash()
-
         return captured_piece, leaving_piece, old_hash
 
     def unmake_move(
@@ -349,7 +537,8 @@ class Board:
             leaving_piece:  Piece - Playing piece that left the board,
                             (or None):
                             a) Prince checkmated, now resurrected.
-                            b) Soldier promoted to Prince, now demoted.
+                            b) Soldier promoted to Prince, now demoted
+                               (the same piece, retyped back to SOLDIER).
             old_hash:       int - hash value of the board BEFORE the move.
 
         Output:
@@ -379,29 +568,24 @@ class Board:
             # It was a normal move (no checkmate) from coord1 to coord2.
 
             # Obtain returning piece and put it back.
-            if leaving_piece is None:
-                # The same piece returns from coord2 to coord1.
-                piece1 = self.board1d[coord2]
-
-                self.board1d[coord2] = None
-                self.boardcode[coord2] = 0
-
-                piece1.coord = coord1
-                self.board1d[coord1] = piece1
-                self.boardcode[coord1] = piece_code[piece1.color][piece1.type]
-                # Now restablish state at 'coord2'.
-                # TODO: Take this out of if/else?
-                if captured_piece is not None:
-                    # It was a move with capture.
-                    self.include_existing_piece(captured_piece, coord2)
-            else:
-                # A Soldier was promoted and must be replaced in coord1.
-                self.remove_piece(coord2)
-                self.include_existing_piece(leaving_piece, coord1)
-                # Now restablish state at 'coord2'.
-                if captured_piece is not None:
-                    # The move was a capture.
-                    self.include_existing_piece(captured_piece, coord2)
+            piece1 = self.board1d[coord2]
+            if leaving_piece is not None:
+                # A Soldier was promoted and must be demoted first.
+                self.demote_prince(coord2)
+
+            self.board1d[coord2] = None
+            self.boardcode[coord2] = 0
+
+            piece1.coord = coord1
+            self.board1d[coord1] = piece1
+            self.boardcode[coord1] = piece_code[piece1.color][piece1.type]
+            move_bits = coord_bit[coord1] | coord_bit[coord2]
+            self.color_mask[piece1.color] ^= move_bits
+            self.piece_mask[piece1.color][piece1.type] ^= move_bits
+            # Now restablish state at 'coord2'.
+            if captured_piece is not None:
+                # It was a move with capture.
+                self.include_existing_piece(captured_piece, coord2)
         else:
             # A checkmated Prince who was on coord1 must return.
             self.include_existing_piece(leaving_piece, coord1)
@@ -411,11 +595,61 @@ class Board:
         # self.turn = WHITE if self.turn == BLACK else BLACK
         # self.boardcode[self.n_positions] = self.turn
 
-        # Finally, refresh the board's hash.
+        # Finally, refresh the board's hash and attack maps.
         # self.hash = self.calculate_hash()
         self.hash = old_hash
+        self.attack_maps = self.attack_maps_stack.pop()
+
+    def make_null_move(self):
+        """
+        Pass the turn to the opponent without moving any piece
+        (a 'null move', not allowed in the game but used in the search).
+
+        Output:
+            old_hash:       int - hash value of the board BEFORE the move.
+        """
+        # Pieces don't change, so attack maps are still valid.
+        old_hash = self.hash
+        self.flip_turn()
+        return old_hash
+
+    def unmake_null_move(self, old_hash):
+        """
+        Revert a previous null move, returning the turn to the player.
+
+        Input:
+            old_hash:       int - hash value of the board BEFORE the move.
+        """
+        self.flip_turn()
+        self.hash = old_hash
+
+    def attack_map(self, color):
+        """
+        Obtain the bitboard of coords attacked by the pieces of a side.
+        It's calculated only once for each position, and recovered
+        from attack_maps_stack when a move is unmade.
+        """
+        attack_map = self.attack_maps[color]
+        if attack_map is None:
+            attack_map = 0
+            occupied = self.color_mask[WHITE] | self.color_mask[BLACK]
+            for piece in self.pieces[color]:
+                if piece.tracing:
+                    continue
+                reach_table = piece_reach[piece.type][color][piece.coord]
+                if reach_table is None:
+                    # Prince, or Soldier out of kingdom: adjacent coords.
+                    attack_map |= \
+                        piece_moves_mask[piece.type][color][piece.coord]
+                else:
+                    # Knight, or Soldier in kingdom: along free rays.
+                    attack_map |= rays_reach(reach_table, occupied)
+            self.attack_maps[color] = attack_map
+        return attack_map
 
     def set_turn(self, color):
+        if color != self.turn:
+            self.hash ^= zobrist_black_turn
         self.turn = color
         self.boardcode[self.n_positions] = self.turn
 
@@ -423,6 +657,7 @@ class Board:
         new_turn = WHITE if self.turn == BLACK else BLACK
         self.turn = new_turn
         self.boardcode[self.n_positions] = self.turn
+        self.hash ^= zobrist_black_turn
 
     def clear_board(self):
         # Not tested. TODO: remove function?
@@ -434,8 +669,16 @@ class Board:
         self.hash = self.calculate_hash()
 
     def calculate_hash(self):
-        return hash(self.boardcode.tostring())  # v1
-        # return hash(str(self.boardcode))  # v2: SLOOOOQW
+        """
+        Calculate from scratch the Zobrist hash of the position
+        (otherwise updated incrementally as pieces and turn change).
+        """
+        board_hash = zobrist_black_turn if self.turn == BLACK else 0
+        for piece in self.pieces[WHITE] + self.pieces[BLACK]:
+            if not piece.tracing:
+                board_hash ^= \
+                    zobrist_piece[piece.color][piece.type][piece.coord]
+        return board_hash
 
     def print_char(self, out_file=None, stylized=False):
         current_pos = self.n_positions - 1
@@ -26,6 +26,7 @@ players = (
 )
 
 n_rounds_per_match = 5
+timing = ""  # No time limit; or e.g. "move:5", "game:300+2".
 pair_equal_depth = False
 
 # Creation of the list of matches.
@@ -54,9 +55,11 @@ with open(tourn_file_name, mode="w") as csv_file:
         quoting=csv.QUOTE_MINIMAL
     )
     writer.writerow([
-        "player_1", "rnd_1", "player_2", "rnd_2", "board", "n_rounds"
+        "player_1", "rnd_1", "player_2", "rnd_2", "board", "n_rounds",
+        "timing"
     ])
     for p in pairings:
         writer.writerow([
-            p[0][0], p[0][1], p[1][0], p[1][1], "", n_rounds_per_match
+            p[0][0], p[0][1], p[1][0], p[1][1], "", n_rounds_per_match,
+            timing
         ])
@@ -7,6 +7,7 @@ import numpy as np
 import re  # Regular expressions.
 import pickle
 import os
+import random
 
 ###############################################################################
 # Precalculated table(s):
@@ -1128,6 +1129,9 @@ knight_moves_flat = (
 # Constants:
 ###############################################################################
 CLEAN_LINE = " "*80
+# Fixed seed for Zobrist keys, so that hash values of positions are the same
+# in every process and run.
+ZOBRIST_SEED = 23022020
 
 ###############################################################################
 # Functions:
@@ -1242,6 +1246,165 @@ def calculate_kingdoms(n):
     return kingdoms
 
 
+def calculate_zobrist_keys(n, seed=ZOBRIST_SEED):
+    """
+    Generate the 64-bit random keys for Zobrist hashing of positions:
+    - piece_keys[color][type][coord]: for a piece on a coord.
+    - black_turn_key: for BLACK to move.
+    """
+    rnd = random.Random(seed)
+    piece_keys = tuple(
+        tuple(
+            tuple(rnd.getrandbits(64) for coord in range(n))
+            for type in range(3)
+        )
+        for color in range(2)
+    )
+    black_turn_key = rnd.getrandbits(64)
+    return piece_keys, black_turn_key
+
+
+def calculate_coord_bits(n):
+    """
+    Bitboard of each single coordinate: coord_bit[c] = 1 << c
+    """
+    return tuple(1 << coord for coord in range(n))
+
+
+def coords_2_mask(coords):
+    """
+    Convert a list of coordinates into a bitboard.
+    E.g. [0, 2, 3] -> 0b1101
+    """
+    mask = 0
+    for coord in coords:
+        mask |= 1 << coord
+    return mask
+
+
+def mask_2_coords(mask):
+    """
+    Convert a bitboard into the list of its coordinates (increasing).
+    E.g. 0b1101 -> [0, 2, 3]
+    """
+    coords = []
+    while mask:
+        low_bit = mask & -mask
+        coords.append(low_bit.bit_length() - 1)
+        mask ^= low_bit
+    return coords
+
+
+def calculate_moves_masks(moves):
+    """
+    Convert a moves table (a list or a list of lists per coordinate)
+    into a tuple with the bitboard of all destinations from each coordinate.
+    """
+    masks = []
+    for coord_moves in moves:
+        if coord_moves != [] and type(coord_moves[0]) == list:
+            # List of moves lists (rays): [[1, 2...], [13, 15...]]
+            masks.append(coords_2_mask(sum(coord_moves, [])))
+        else:
+            # List of moves: [1, 2, 3...]
+            masks.append(coords_2_mask(coord_moves))
+    return tuple(masks)
+
+
+def calculate_ray_reach_table(ray):
+    """
+    Calculate the coords reached along a ray for every occupancy of it.
+
+    Input:
+        ray:        list of coords in order of distance, e.g. [1, 13, 14...]
+
+    Output:
+        inner_mask: int - bitboard of the ray's coords that can block
+                    others (all but the last one).
+        reach_table:dict - {<occupied & inner_mask>: <bitboard reached>},
+                    INcluding in each case the first occupied coord.
+    """
+    inner_mask = coords_2_mask(ray[:-1])
+    reach_table = {}
+    occupancy = 0
+    while True:
+        # Walk the ray till the first occupied coord.
+        reach = 0
+        for coord in ray:
+            reach |= 1 << coord
+            if occupancy & (1 << coord):
+                break
+        reach_table[occupancy] = reach
+        # Next subset of inner_mask (or back to 0 when done).
+        occupancy = (occupancy - inner_mask) & inner_mask
+        if occupancy == 0:
+            break
+    return inner_mask, reach_table
+
+
+def calculate_reach_tables(moves):
+    """
+    Convert a moves table into a tuple with, for each coordinate:
+    a) None, if it has a plain list of moves (e.g. Prince).
+    b) if it has a list of moves lists (rays, e.g. Knight), a tuple
+       (<inner_mask>, <ray tables>, <cache>) where:
+       - inner_mask: bitboard of all coords that can block a ray.
+       - ray tables: the (inner_mask, reach_table) of each ray,
+         as given by calculate_ray_reach_table().
+       - cache: dict {<occupied & inner_mask>: <bitboard reached>},
+         filled as new occupancies are found, up to a size cap
+         (see board.rays_reach()).
+    """
+    reach_tables = []
+    for coord_moves in moves:
+        if coord_moves != [] and type(coord_moves[0]) == list:
+            ray_tables = tuple(
+                calculate_ray_reach_table(ray) for ray in coord_moves
+            )
+            inner_mask = 0
+            for ray_inner_mask, _ in ray_tables:
+                inner_mask |= ray_inner_mask
+            reach_tables.append((inner_mask, ray_tables, {}))
+        else:
+            reach_tables.append(None)
+    return tuple(reach_tables)
+
+
+def calculate_soldier_jumps(knight_moves, kingdoms):
+    """
+    For each side and coordinate, the double steps a Soldier of that side
+    can take from its kingdom to reach the coordinate, as a tuple of pairs
+    (<bit of the coord in between>, <bit of the Soldier's coord>).
+    """
+    soldier_jumps = []
+    for side in range(2):
+        soldier_jumps.append(
+            tuple(
+                tuple(
+                    (1 << ray[0], 1 << ray[1])
+                    for ray in rays
+                    if len(ray) > 1 and kingdoms[side][ray[1]]
+                )
+                for rays in knight_moves
+            )
+        )
+    return tuple(soldier_jumps)
+
+
+def calculate_between_masks(knight_moves, n):
+    """
+    For each pair of coordinates on a common ray, the bitboard of coords
+    strictly between them (0 if adjacent or not on a common ray).
+    E.g. between_mask[0][3] -> coords 1, 2
+    """
+    between_mask = [[0] * n for _ in range(n)]
+    for coord1, rays in enumerate(knight_moves):
+        for ray in rays:
+            for i, coord2 in enumerate(ray):
+                between_mask[coord1][coord2] = coords_2_mask(ray[:i])
+    return tuple(tuple(masks) for masks in between_mask)
+
+
 def calculate_and_save_distance_from_to(n_rows=49):
     """
     Calculate the distance matrix for each i, j coordinates
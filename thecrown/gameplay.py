@@ -4,6 +4,11 @@ import copy
 import sys
 import types
 import time
+import struct
+import weakref
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
 from operator import itemgetter
 from itertools import dropwhile
 
@@ -209,6 +214,9 @@ END_DEPTH_PENALTY = 1
 PLAYER_WINS = float(10000)  # Winning score; to be reduced by node depth.
 OPPONENT_WINS = -PLAYER_WINS  # Losing score; to be increased by node depth.
 DRAW = 0
+# Scores beyond this encode a game end: PLAYER_WINS - (depth of the end).
+MAX_END_DEPTH = 100
+END_SCORE_THRESHOLD = PLAYER_WINS - MAX_END_DEPTH * END_DEPTH_PENALTY
 
 # Possible end-game results - by color:
 TXT_WHITE_WINS = "1 - 0"
@@ -240,15 +248,13 @@ N_TRACE_COLS = 3  # Number of columns required for the above data.
 
 ########################################################################
 # Hash table used for transpositions.
-# Note: current implementation, based on Python dictionaries, does NOT
-# reserve memory upfront. This number is thus the maximum limit allowed.
-HASH_SIZE_1 = 65537
-HASH_SIZE_2 = 131071
-HASH_SIZE_3 = 262147
-HASH_SIZE_4 = 524287
-HASH_SIZE_5 = 1048573
-
-DEFAULT_HASH_SIZE = HASH_SIZE_5  # Max. size of the hash table.
+# A preallocated numpy array of buckets indexed by the low bits of the hash,
+# each bucket holding two entries:
+# - [0] depth-preferred: replaced by entries searched at least as deep,
+#       or by any entry if it was stored in a previous search (generation).
+# - [1] always-replace: takes the entries not stored in [0].
+DEFAULT_TT_SIZE_MB = 64  # Memory reserved for the hash table (MB).
+TT_BUCKET_SIZE = 2
 
 HASH_IDX = 0    # The full hash value of the position.
 DEPTH_IDX = 1   # The depth from which the position was explored.
@@ -257,6 +263,21 @@ FLAG_IDX = 3    # The type of value (EXACT / LOWERBOUND / UPPERBOUND).
 MOVE_IDX = 4    # The best move found in the position.
 DEPTH_SRCH_IDX = 5  # The depth with whith the position was searched.
 
+# Entries of the hash table, packing the same fields in the same order.
+TT_ENTRY_DTYPE = np.dtype([
+    ("key", np.uint64),
+    ("depth", np.int16),
+    ("value", np.float64),
+    ("flag", np.uint8),
+    ("move", np.uint16),  # (coord1 << 8) | coord2 [TT_NO_COORD if None].
+    ("depth_searched", np.int16),
+    ("generation", np.uint8)  # The search that stored / used the entry.
+])
+TT_GENERATION_IDX = 6
+TT_NO_COORD = 0xFF  # coord2 of a checkmated Prince leaving.
+TT_NO_MOVE = 0xFFFF  # No move stored.
+TT_EMPTY = 0xFF  # Flag of an empty entry.
+
 EXACT = 0
 LOWER_BOUND = 1
 UPPER_BOUND = 2
@@ -265,6 +286,40 @@ UPPER_BOUND = 2
 # Killer moves.
 MAX_DEPTH_KILLER_MOVES = 20  # Will be ignored beyond this depth.
 
+# History heuristic (set as "history_heuristic" in params):
+HISTORY_MAX = 1 << 20  # All values are halved when one exceeds this.
+
+# Move ordering bonus of non captures (as negatives for faster sorting):
+KILLER_BONUS = -30
+COUNTERMOVE_BONUS = -20  # Set as "countermoves" in params.
+FOLLOWUP_BONUS = -15
+
+# Time control:
+TIME_CHECK_NODES = 256  # Nodes searched between checks of the clock.
+
+# Aspiration windows (half-width set as "aspiration_window" in params):
+ASPIRATION_WIDENING = 4  # Window growth after each failed search.
+ASPIRATION_MAX_RESEARCHES = 2  # Then, a full window is used.
+
+# Principal Variation Search (set as "pvs" in params):
+PVS_EPSILON = 1e-6  # Width of the null window.
+
+# Null-move pruning (set as "null_move" in params):
+NULL_MOVE_REDUCTION = 2  # Plies less searched after a null move.
+
+# Late move reductions (plies set as "lmr_reduction" in params):
+LMR_FULL_DEPTH_MOVES = 3  # Moves never reduced (unless "lmr_moves").
+LMR_MIN_DEPTH = 3  # Min. depth left to reduce moves.
+
+# Futility pruning (set as "futility_pruning" / "delta_pruning" in params):
+FUTILITY_MARGIN = 2 * SOLDIER_WEIGHT  # Max. gain of a quiet move.
+REVERSE_FUTILITY_MARGIN = 2 * SOLDIER_WEIGHT  # Per ply of depth left.
+REVERSE_FUTILITY_DEPTH = 2  # Max. depth left to prune a whole node.
+DELTA_MARGIN = KNIGHT_WEIGHT / 2  # Max. positional gain of a capture.
+
+# Principal variation:
+MAX_PV_PLIES = 64  # Will be ignored beyond this depth.
+
 
 class Gametrace:
     def __init__(self, first_board, max_length=DEFAULT_TRACE_LENGTH):
@@ -279,8 +334,11 @@ class Gametrace:
           to cut repetition search above plies labelled as "True".
         - Store match: moves sequence from start to self.current_board_ply.
         """
-        # Initialize the tracing array.
-        self.level_trace = np.zeros((max_length, N_TRACE_COLS))
+        # Initialize the tracing array (integers, so that 64-bit hash
+        # values are kept exactly).
+        self.level_trace = np.zeros(
+            (max_length, N_TRACE_COLS), dtype=np.uint64
+        )
         # Initialize internal variables.
         self.current_board_ply = -1  # So that first board gets 0.
         self.max_depth_searched = 0  # Search not started yet.
@@ -349,7 +407,9 @@ class Gametrace:
         # pylint: disable=E1136  # pylint/issues/3139
         if ply_number >= self.level_trace.shape[0]:  # pylint: disable=E1136
             # Max depth exceeded: extend array.
-            trace_patch = np.zeros((DEFAULT_TRACE_EXTENSION, N_TRACE_COLS))
+            trace_patch = np.zeros(
+                (DEFAULT_TRACE_EXTENSION, N_TRACE_COLS), dtype=np.uint64
+            )
             self.level_trace = np.concatenate(
                 (self.level_trace, trace_patch), axis=0
                 )
@@ -404,10 +464,10 @@ class Gametrace:
 
 class Transposition_table:
     """
-    Implements a hash-table of some limited size storing information about
+    Implements a hash-table of fixed size storing information about
     board positions, identified by some key.
 
-    Board information is stored as a list:
+    Board information is retrieved as a tuple:
     - The full hash value of the position (in case it's cut to table's length).
     - The depth from which the position was explored (plys from root).
     - The value found for the position.
@@ -417,52 +477,100 @@ class Transposition_table:
         a) full search:         plies to max-depth
         b) quiescence search:   0
 
-    Assumptions:
-        The key provided identifies uniquely a board position.
-        Python 3.7: Dictionary order is guaranteed to be insertion order.
+    Storage:
+        A numpy structured array of 2^n buckets of TT_BUCKET_SIZE entries
+        (see TT_ENTRY_DTYPE), as many as fit in 'size_mb' megabytes,
+        indexed by the lowest n bits of the key.
+
+    Aging:
+        new_search() starts a new generation (e.g. for each move played);
+        entries not stored or retrieved since then are replaced first.
     """
-    def __init__(self, size=DEFAULT_HASH_SIZE):
+    def __init__(self, size_mb=DEFAULT_TT_SIZE_MB):
         # Data:
-        self.size = size
-        self.table = {}
+        n_buckets = max(
+            1, int(size_mb * 2**20) //
+            (TT_BUCKET_SIZE * TT_ENTRY_DTYPE.itemsize)
+        )
+        n_buckets = 1 << (n_buckets.bit_length() - 1)  # Power of 2.
+        self.size = n_buckets * TT_BUCKET_SIZE
+        self.mask = n_buckets - 1
+        self.table = np.zeros(
+            (n_buckets, TT_BUCKET_SIZE), dtype=TT_ENTRY_DTYPE
+        )
+        self.table["flag"] = TT_EMPTY
+        self.generation = 0
         # Metrics:
+        self.used = 0
         self.hits = 0
         self.collisions = 0
         self.updates = 0
 
     def insert(self, key, value):
-        current_value = self.table.get(key, None)
-        if current_value is None:
-            # Empty position: use it.
-            self.table[key] = value
-            # If max. size exceeded, pop oldest entry.
-            if len(self.table) > self.size:
-                self.table.pop(next(iter(self.table)))
+        index = key & self.mask
+        depth_preferred, always_replace = self.read_bucket(index)
+        if depth_preferred[FLAG_IDX] == TT_EMPTY or \
+                value[DEPTH_SRCH_IDX] >= depth_preferred[DEPTH_SRCH_IDX]:
+            # Searched as deep or deeper: replace the depth-preferred entry.
+            slot, entry = 0, depth_preferred
+        elif depth_preferred[HASH_IDX] == key:
+            # Same position searched deeper before: keep it.
+            self.updates += 1
+            return
+        elif depth_preferred[TT_GENERATION_IDX] != self.generation:
+            # A deeper entry, but from a previous search: replace it.
+            slot, entry = 0, depth_preferred
         else:
-            # Collision or update: resolve by depth (root node has depth 0).
+            slot, entry = 1, always_replace
+        if entry[FLAG_IDX] == TT_EMPTY:
+            self.used += 1
+        elif entry[HASH_IDX] == key:
             self.updates += 1
-            if value[DEPTH_SRCH_IDX] >= current_value[DEPTH_SRCH_IDX]:
-                # The new value was more deeply explored, or is newer: replace.
-                self.table[key] = value
+        else:
+            self.collisions += 1
+        self.write_entry(index, slot, (
+            key, value[DEPTH_IDX], value[VALUE_IDX], value[FLAG_IDX],
+            pack_move(value[MOVE_IDX]), value[DEPTH_SRCH_IDX],
+            self.generation
+        ))
 
     def retrieve(self, key):
-        current_value = self.table.get(key, None)
-        if current_value is not None and current_value[HASH_IDX] == key:
-            # Successful retrieval.
-            self.hits += 1
-            return current_value
-        else:
-            # Value not found.
-            return None
+        index = key & self.mask
+        for slot, entry in enumerate(self.read_bucket(index)):
+            if entry[HASH_IDX] == key and entry[FLAG_IDX] != TT_EMPTY:
+                # Successful retrieval; the entry is still in use.
+                self.hits += 1
+                if entry[TT_GENERATION_IDX] != self.generation:
+                    self.write_entry(
+                        index, slot,
+                        entry[:TT_GENERATION_IDX] + (self.generation,)
+                    )
+                return entry[:MOVE_IDX] + (
+                    unpack_move(entry[MOVE_IDX]), entry[DEPTH_SRCH_IDX]
+                )
+        # Value not found.
+        return None
+
+    def read_bucket(self, index):
+        # Entries as tuples in TT_ENTRY_DTYPE fields' order.
+        return self.table[index].tolist()
+
+    def write_entry(self, index, slot, entry):
+        self.table[index, slot] = entry
+
+    def new_search(self):
+        # Start a new generation: older entries become replaceable.
+        self.generation = (self.generation + 1) & 0xFF
 
     def metrics(self):
         return (
-            self.size, len(self.table), self.hits, self.collisions,
+            self.size, self.used, self.hits, self.collisions,
             self.updates
             )
 
     def clear(self):
-        self.table.clear()
+        self.table["flag"] = TT_EMPTY
+        self.used = 0
         self.hits = 0
         self.collisions = 0
         self.updates = 0
@@ -488,6 +596,126 @@ class Transposition_table:
         )
 
 
+class Shared_transposition_table(Transposition_table):
+    """
+    A Transposition_table stored in shared memory, so that searches in
+    several processes use the same one.
+    Created by a process (its owner) and attached by name in the others;
+    it's passed to other processes just by pickling it.
+
+    Storage:
+        A header word (the current generation) and 2^n buckets of
+        TT_BUCKET_SIZE entries, each one packed as three uint64 words:
+        - key ^ data_1 ^ data_2
+        - data_1: the value (float64 bits).
+        - data_2: depth, depth_searched, move, flag + 1 (0 if empty) and
+                  generation (16, 16, 16, 8 and 8 bits).
+        Entries are written with no locks: an entry being written by
+        another process, or half-written, doesn't match its key and is
+        ignored as empty.
+
+    Metrics (but for table usage) are counted per process.
+    """
+    def __init__(self, size_mb=DEFAULT_TT_SIZE_MB, name=None):
+        n_buckets = max(
+            1, int(size_mb * 2**20) // (TT_BUCKET_SIZE * 3 * 8)
+        )
+        n_buckets = 1 << (n_buckets.bit_length() - 1)  # Power of 2.
+        self.size_mb = size_mb
+        self.size = n_buckets * TT_BUCKET_SIZE
+        self.mask = n_buckets - 1
+        # Data: created (filled with zeros, i.e. empty) or attached.
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(
+            name=name, create=self.owner, size=8 * (1 + self.size * 3)
+        )
+        self.name = self.shm.name
+        self.header = np.ndarray((1,), dtype=np.uint64, buffer=self.shm.buf)
+        self.table = np.ndarray(
+            (n_buckets, TT_BUCKET_SIZE, 3), dtype=np.uint64,
+            buffer=self.shm.buf, offset=8
+        )
+        weakref.finalize(self, release_shared_memory, self.shm, self.owner)
+        # Metrics:
+        self.used = 0
+        self.hits = 0
+        self.collisions = 0
+        self.updates = 0
+
+    def __reduce__(self):
+        # Pickled as a reference to the same shared memory.
+        return (Shared_transposition_table, (self.size_mb, self.name))
+
+    @property
+    def generation(self):
+        return int(self.header[0])
+
+    @generation.setter
+    def generation(self, generation):
+        self.header[0] = generation
+
+    def read_bucket(self, index):
+        bucket = []
+        for check, data_1, data_2 in self.table[index].tolist():
+            key = check ^ data_1 ^ data_2
+            flag = ((data_2 >> 8) & 0xFF) - 1
+            if flag < 0:
+                bucket.append((key, 0, 0.0, TT_EMPTY, TT_NO_MOVE, 0, 0))
+            else:
+                bucket.append((
+                    key,
+                    (data_2 >> 48) - 0x8000,
+                    struct.unpack("<d", struct.pack("<Q", data_1))[0],
+                    flag,
+                    (data_2 >> 16) & 0xFFFF,
+                    ((data_2 >> 32) & 0xFFFF) - 0x8000,
+                    data_2 & 0xFF
+                ))
+        return bucket
+
+    def write_entry(self, index, slot, entry):
+        key, depth, value, flag, move, depth_searched, generation = entry
+        data_1 = struct.unpack("<Q", struct.pack("<d", value))[0]
+        data_2 = \
+            int(depth + 0x8000) << 48 | \
+            int(depth_searched + 0x8000) << 32 | \
+            int(move) << 16 | \
+            int(flag + 1) << 8 | \
+            int(generation)
+        self.table[index, slot] = (key ^ data_1 ^ data_2, data_1, data_2)
+
+    def metrics(self):
+        # Usage by all processes.
+        self.used = int(np.count_nonzero(self.table[:, :, 2]))
+        return super().metrics()
+
+    def clear(self):
+        self.table.fill(0)
+        self.used = 0
+        self.hits = 0
+        self.collisions = 0
+        self.updates = 0
+
+    def close(self):
+        # Release this process' access (and the memory, if owner).
+        release_shared_memory(self.shm, self.owner)
+
+
+def release_shared_memory(shm, unlink):
+    """
+    Close a shared memory block, and destroy it if 'unlink' is True.
+    """
+    try:
+        shm.close()
+    except BufferError:
+        pass  # Still in use by arrays being released at exit.
+    if unlink:
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass  # Already released.
+
+
 class Killer_Moves:
     """
     A list of moves indexed by ply or level of the search.
@@ -531,6 +759,202 @@ class Killer_Moves:
             self.killer_list.append([None, None])
 
 
+class PV_table:
+    """
+    The principal variation (best line) found from each ply of the current
+    search, as a triangular table: the line at a ply is the move that
+    raised alpha there followed by the line found at the next ply.
+    The line of the last completed search is kept, to be searched first by
+    the next (deeper) one in iterative deepening.
+    Capacity:
+    - Limited depth: moves beyond certain ply are not stored.
+    """
+    def __init__(self, size=MAX_PV_PLIES):
+        self.size = size
+        self.lines = [[] for _ in range(size + 1)]  # The last one stays [].
+        self.last_pv = []
+
+    def clear(self, ply):
+        # A new node is searched at this ply.
+        if ply < self.size:
+            self.lines[ply] = []
+
+    def update(self, ply, move, game_end=False):
+        # A move raised alpha at this ply: take the line searched after it
+        # (none if the move ended the game).
+        if ply < self.size:
+            self.lines[ply] = [move] if game_end \
+                else [move] + self.lines[ply + 1]
+
+    def principal_variation(self, best_move):
+        # Return the line found from the root, starting with 'best_move'
+        # (only that one if the root's line is not known, e.g. after a
+        # transposition table's hit).
+        if best_move is None:
+            return []
+        pv = self.lines[0] if self.lines[0][:1] == [best_move] \
+            else [best_move]
+        return [
+            [int(coord1), None if coord2 is None else int(coord2)]
+            for coord1, coord2 in pv
+        ]
+
+    def follow(self, pv):
+        # Set the line to be searched first by next search.
+        self.last_pv = pv
+
+    def pv_move(self, ply, search_trace):
+        # Return the move of the last line at this ply, if the search
+        # is still following it (or None).
+        if ply < len(self.last_pv) and search_trace == self.last_pv[:ply]:
+            return self.last_pv[ply]
+        return None
+
+
+class Search_control:
+    """
+    The deadline of a time-limited search, checked every TIME_CHECK_NODES
+    nodes by negamax() and quiesce(), which unwind without updating the
+    transposition table or killer moves once it's over (stopped).
+    The search can only be stopped once can_stop is set, so that at least
+    one iteration is completed and a move is always found.
+    """
+    def __init__(self, deadline):
+        self.deadline = deadline  # As time.time().
+        self.nodes = 0
+        self.can_stop = False
+        self.stopped = False
+
+    def check(self):
+        # Count a new node, returning whether the search must stop.
+        self.nodes += 1
+        if self.can_stop and self.nodes % TIME_CHECK_NODES == 0 and \
+                time.time() >= self.deadline:
+            self.stopped = True
+        return self.stopped
+
+
+class History_table:
+    """
+    Scores of quiet moves by side, origin and destination coords,
+    increased every time they cause a beta-cutoff (more the deeper the
+    search below), used to sort quiet moves other than killer moves.
+    Values are halved between searches (aging), so that recent
+    cutoffs weigh more.
+    """
+    def __init__(self):
+        self.table = np.zeros(
+            (2, bd.N_POSITIONS, bd.N_POSITIONS), dtype=np.int64
+        )
+
+    def insert(self, side, move, depth_searched):
+        # Reward a move that just created a cut-off.
+        coord1, coord2 = move
+        self.table[side, coord1, coord2] += depth_searched * depth_searched
+        if self.table[side, coord1, coord2] > HISTORY_MAX:
+            self.table >>= 1
+
+    def age(self):
+        # Reduce weight of previous searches (e.g. before a new one).
+        self.table >>= 1
+
+    def clear(self):
+        self.table.fill(0)
+
+
+class Countermove_table:
+    """
+    Non captures that caused a beta-cutoff, indexed by side and the
+    previous move in the search: the opponent's (countermoves) and the
+    player's own before that (follow-up moves), to be tried right after
+    killer moves.
+    Hits and tries count cutoffs by a countermove, out of all cutoffs
+    by non captures in nodes where there was one.
+    """
+    def __init__(self):
+        # [countermove, follow-up][side][coord1][coord2] -> [coord1, coord2]
+        self.table = np.full(
+            (2, 2, bd.N_POSITIONS, bd.N_POSITIONS, 2), -1, dtype=np.int8
+        )
+        self.hits = 0
+        self.tries = 0
+
+    def retrieve(self, side, search_trace):
+        # Return [countermove, follow-up move] (any of them may be None).
+        c_moves = [None, None]
+        for i in range(min(2, len(search_trace))):
+            previous_move = search_trace[-1 - i]
+            if previous_move is None or previous_move[1] is None:
+                continue  # Null move, or a Prince leaving.
+            coord1, coord2 = self.table[i, side, previous_move[0],
+                                        previous_move[1]]
+            if coord1 >= 0:
+                c_moves[i] = [int(coord1), int(coord2)]
+        return c_moves
+
+    def insert(self, side, search_trace, move):
+        # Register a non capture that just created a cut-off.
+        for i in range(min(2, len(search_trace))):
+            previous_move = search_trace[-1 - i]
+            if previous_move is None or previous_move[1] is None:
+                continue
+            entry = self.table[i, side, previous_move[0], previous_move[1]]
+            if i == 0 and entry[0] >= 0:
+                self.tries += 1
+                if entry.tolist() == move:
+                    self.hits += 1
+            entry[:] = move
+
+    def reset_metrics(self):
+        self.hits = 0
+        self.tries = 0
+
+
+def check_search_control(params):
+    # Count a node in the search's Search_control, if any (see check()).
+    control = params.get("search_control")
+    return control is not None and control.check()
+
+
+def search_stopped(params):
+    # Whether the search's time is over, if controlled by a Search_control.
+    control = params.get("search_control")
+    return control is not None and control.stopped
+
+
+def create_transposition_table(params):
+    """
+    Create a transposition table with the size set in the search
+    parameters as "tt_size_mb" (DEFAULT_TT_SIZE_MB if missing),
+    in shared memory if "tt_shared" is True or several "workers" search.
+    """
+    size_mb = params.get("tt_size_mb", DEFAULT_TT_SIZE_MB)
+    if params.get("tt_shared", False) or params.get("workers", 1) > 1:
+        return Shared_transposition_table(size_mb)
+    return Transposition_table(size_mb)
+
+
+def pack_move(move):
+    """
+    Pack a move [coord1, coord2] (or None) into a 16-bit integer
+    for the transposition table.
+    """
+    if move is None:
+        return TT_NO_MOVE
+    coord1, coord2 = move
+    return (coord1 << 8) | (TT_NO_COORD if coord2 is None else coord2)
+
+
+def unpack_move(packed_move):
+    """
+    Unpack a move packed by pack_move().
+    """
+    if packed_move == TT_NO_MOVE:
+        return None
+    coord2 = packed_move & 0xFF
+    return [packed_move >> 8, None if coord2 == TT_NO_COORD else coord2]
+
+
 def is_killer(m1, m2, k1, k2, k3, k4):
     """
     Check if the move [m1, m2] is contained in killer moves list:
@@ -544,7 +968,8 @@ def is_killer(m1, m2, k1, k2, k3, k4):
 
 def play(
     board, params=DEFAULT_SEARCH_PARAMS, trace=None, max_time=float("inf"),
-    t_table=None, killer_list=None, screen_traces=True
+    t_table=None, killer_list=None, screen_traces=True, history_table=None,
+    countermove_table=None, search_metrics=None
 ):
     # Capture initial time for time keeping.
     time_0 = time.time()
@@ -568,27 +993,132 @@ def play(
     keep_iterating = True
     alpha, beta = [-float("inf"), float("inf")]
     depth = 0
+    n_workers = params_copy.get("workers", 1)
+    if n_workers > 1 and \
+            not isinstance(t_table, Shared_transposition_table):
+        # Parallel search: the table must be shared with helpers.
+        t_table = Shared_transposition_table(
+            params_copy.get("tt_size_mb", DEFAULT_TT_SIZE_MB)
+        )
     if params_copy["transposition_table"] and t_table is None:
-        t_table = Transposition_table()
+        t_table = create_transposition_table(params_copy)
     if params_copy["killer_moves"] and killer_list is None:
         killer_list = Killer_Moves()
+    if t_table is not None:
+        # Entries from previous moves' searches become replaceable.
+        t_table.new_search()
+    if params_copy.get("history_heuristic", False):
+        if history_table is None:
+            history_table = History_table()
+        # Previous moves' cutoffs weigh less.
+        history_table.age()
+        params_copy["history_table"] = history_table
+    if params_copy.get("countermoves", False):
+        if countermove_table is None:
+            countermove_table = Countermove_table()
+        countermove_table.reset_metrics()
+        params_copy["countermove_table"] = countermove_table
+    pv_table = PV_table()
+    params_copy["pv_table"] = pv_table
     search_trace = []
 
+    # Hard time limit: searches are aborted when it's over, but only
+    # after the first iteration has been completed.
+    control = None
+    if max_time < float("inf"):
+        control = Search_control(time_0 + max_time)
+        params_copy["search_control"] = control
+
+    # Parallel search modes:
+    # - "lazy_smp": helper processes search the same root, filling the
+    #   shared transposition table used by this (main) search.
+    # - "root_split": root moves are searched by a pool of processes.
+    helpers, executor = [], None
+    if n_workers > 1 and \
+            params_copy.get("parallel_mode", "lazy_smp") == "root_split":
+        executor = ProcessPoolExecutor(max_workers=n_workers)
+    else:
+        helpers = [
+            multiprocessing.Process(
+                target=search_helper,
+                args=(board, params, trace, t_table, helper_id),
+                daemon=True
+            )
+            for helper_id in range(1, n_workers)
+        ]
+    for helper in helpers:
+        helper.start()
+
+    # Searches repeated after failing low / high on aspiration windows,
+    # countermoves' hits and the principal variation found: filled in
+    # the 'search_metrics' dict passed by the caller, if any.
+    if search_metrics is None:
+        search_metrics = {}
+    search_metrics.update({
+        "researches": 0, "full_window_researches": 0,
+        "countermove_hits": 0, "countermove_tries": 0, "pv": []
+    })
+    aspiration_window = params_copy.get("aspiration_window", 0)
+
     # Iterative deepening loop.
+    first_iteration = True
     while keep_iterating:
-        # Run search for move selection.
-        # Reuse: transposition table, killer moves.
-        move, result, game_end, game_status = negamax(
-            board, depth, alpha, beta, params_copy,
-            t_table, trace, killer_list, search_trace
-            )
-        # Display search status: move found after iteration.
+        # Set an aspiration window around last iteration's result.
+        window = aspiration_window
+        if window and not first_iteration:
+            alpha, beta = result - window, result + window
+        else:
+            alpha, beta = [-float("inf"), float("inf")]
+        n_fails = 0
+        while True:
+            # Run search for move selection.
+            # Reuse: transposition table, killer moves.
+            if executor is None:
+                search_result = negamax(
+                    board, depth, alpha, beta, params_copy,
+                    t_table, trace, killer_list, search_trace
+                    )
+            else:
+                search_result = negamax_root_split(
+                    board, alpha, beta, params_copy, t_table, trace,
+                    killer_list, executor
+                    )
+            search_value = search_result[1]
+            if search_stopped(params_copy) or \
+                    alpha < search_value < beta or \
+                    alpha == -float("inf") and beta == float("inf"):
+                break
+            # Failed low / high: search again with a wider window,
+            # or a full one after ASPIRATION_MAX_RESEARCHES.
+            n_fails += 1
+            search_metrics["researches"] += 1
+            if n_fails > ASPIRATION_MAX_RESEARCHES:
+                alpha, beta = [-float("inf"), float("inf")]
+                search_metrics["full_window_researches"] += 1
+            else:
+                window *= ASPIRATION_WIDENING
+                if search_value <= alpha:
+                    alpha = result - window
+                else:
+                    beta = result + window
+        if search_stopped(params_copy):
+            # Time is over: keep last completed iteration's results.
+            break
+        move, result, game_end, game_status = search_result
+        # Principal variation, to be searched first in next iteration.
+        pv = pv_table.principal_variation(move)
+        pv_table.follow(pv)
+        first_iteration = False
+        if control is not None:
+            control.can_stop = True
+        # Display search status: move found after iteration, and its line.
         if screen_traces:
             print(
-                "Searching at depth {:d}... {} ({:>+.5f}) \r".format(
+                "Searching at depth {:d}... {} ({:>+.5f}) {} \r".format(
                     params_copy["max_depth"],
                     ut.move_2_txt(move),
-                    result
+                    result,
+                    " ".join([ut.move_2_txt(pv_move) for pv_move in pv])
                 ),
                 end="", flush=True
             )
@@ -605,7 +1135,15 @@ def play(
             do_iterative_deepening and \
             params_copy["max_depth"] <= max_depth and \
             time_1 - time_0 < max_time and \
-            abs(result) < PLAYER_WINS - 100
+            not is_end_score(result)
+    time_1 = time.time()
+
+    # Stop helpers (their half-written table entries are ignored).
+    for helper in helpers:
+        helper.terminate()
+        helper.join()
+    if executor is not None:
+        executor.shutdown()
 
     # Clear search status.
     if screen_traces:
@@ -618,10 +1156,184 @@ def play(
     t_table_metrics = t_table.metrics()
     # t_table.clear()  # Not cleard so it's used in next turn.
 
+    # Get countermoves' metrics.
+    if countermove_table is not None:
+        search_metrics["countermove_hits"] = countermove_table.hits
+        search_metrics["countermove_tries"] = countermove_table.tries
+    # The expected line of play.
+    search_metrics["pv"] = pv
+
     return move, result, game_end, game_status, \
         time_1 - time_0, t_table_metrics
 
 
+def search_helper(board, params, trace, t_table, helper_id):
+    """
+    Search the root position like play(), as a helper process in a
+    parallel search (Lazy SMP), with the only purpose of filling the
+    shared transposition table. Odd helpers search one ply deeper at
+    each iteration, so that they diverge from the main search.
+    The main process terminates helpers once its own search is over.
+
+    Input:
+        board:          Board - the position to play on (a copy).
+        params:         A dictionary with the search settings to follow.
+        trace:          The structure tracking played / searched boards.
+        t_table:        Shared_transposition_table - the table to fill.
+        helper_id:      int - 1, 2, 3... (0 being the main search).
+    """
+    params_copy = params.copy()
+    max_depth = params["max_depth"]
+    quiesc_depth_delta = params["max_check_quiesc_depth"] - max_depth
+    initial_depth = min(2, max_depth) if params["iterative_deepening"] \
+        else max_depth
+    killer_list = Killer_Moves()
+    for depth in range(
+        initial_depth + helper_id % 2, max_depth + helper_id % 2 + 1
+    ):
+        params_copy["max_depth"] = depth
+        params_copy["max_check_quiesc_depth"] = depth + quiesc_depth_delta
+        negamax(
+            board, 0, -float("inf"), float("inf"), params_copy,
+            t_table, trace, killer_list, []
+        )
+
+
+def negamax_root_split(
+    board, alpha, beta, params, t_table, trace, killer_list, executor
+):
+    """
+    Search the root position like negamax(), splitting its moves among
+    a pool of processes: the first move (best ordered) is searched here
+    to get a bound, and then the rest are searched in parallel with it
+    as alpha (young brothers wait), all within the window [alpha, beta].
+    Each process searches on its own copies of the board and trace,
+    with its own killer moves.
+
+    Input:
+        board:          Board - the position to play on.
+        alpha:          float - the score the player is assured of.
+        beta:           float - the score the opponent is assured of.
+        params:         A dictionary with the search settings to follow.
+        t_table:        Shared_transposition_table - shared by all
+                        processes.
+        trace:          The structure tracking played / searched boards.
+        killer_list:    Killer moves for the first move's search.
+        executor:       ProcessPoolExecutor - the pool of processes.
+
+    Output:
+        Same as negamax().
+    """
+    # Root conditions, mate and stalemate are left to negamax().
+    _, _, game_end, _ = evaluate_terminal(board, 0)
+    moves, moves_count = generate_legal_moves(board)
+    if game_end or moves_count < 2:
+        return negamax(
+            board, 0, alpha, beta, params,
+            t_table, trace, killer_list, []
+        )
+    if trace is not None:
+        trace.register_searched_board(board, 0)
+
+    # Sort moves, trying first the one found in previous iterations.
+    k_moves = killer_list.retrieve(0) if killer_list is not None \
+        else [None, None]
+    moves = pre_evaluate_pseudomoves(
+        board, moves, k_moves, params.get("history_table"),
+        see=params.get("see", False)
+    ).tolist()
+    value = t_table.retrieve(board.hash)
+    if value is not None and value[MOVE_IDX] in moves:
+        moves.remove(value[MOVE_IDX])
+        moves.insert(0, value[MOVE_IDX])
+
+    # First move, searched serially.
+    alpha_orig = alpha
+    best_move = moves[0]
+    alpha = search_root_move(
+        board, best_move, alpha, beta, params, t_table, trace,
+        killer_list if killer_list is not None else Killer_Moves()
+    )
+    if alpha is None:
+        return None, DRAW, False, ON_GOING  # Time is over.
+    pv_table = params.get("pv_table")
+    if pv_table is not None:
+        pv_table.clear(0)
+        if alpha > alpha_orig:
+            pv_table.update(0, best_move)
+    if alpha >= beta:
+        # Ignore rest of moves [fail-hard beta cutoff].
+        t_table.update_values(
+            board, 0, beta, alpha_orig, beta,
+            best_move, params["max_depth"]
+        )
+        return best_move, beta, False, ON_GOING
+
+    # The rest, searched in parallel within [alpha, beta].
+    futures = [
+        executor.submit(
+            search_root_move,
+            board, move, alpha, beta, params, t_table, trace, None
+        )
+        for move in moves[1:]
+    ]
+    best_result = alpha
+    for move, future in zip(moves[1:], futures):
+        result = future.result()
+        if result is None:
+            # Time is over (as seen by the worker's copy of the control).
+            params["search_control"].stopped = True
+            for future in futures:
+                future.cancel()
+            return None, DRAW, False, ON_GOING
+        if result > best_result:
+            best_move, best_result = move, result
+            if pv_table is not None:
+                # Its line was searched by another process.
+                pv_table.clear(1)
+                pv_table.update(0, best_move)
+
+    t_table.update_values(
+        board, 0, best_result, alpha_orig, beta,
+        best_move, params["max_depth"]
+    )
+    return best_move, best_result, False, ON_GOING
+
+
+def search_root_move(
+    board, move, alpha, beta, params, t_table, trace, killer_list
+):
+    """
+    Search a legal root move, returning its result from the moving side's
+    perspective, within [alpha, beta] (fail-hard).
+    If no killer_list is passed (e.g. in a worker process), a new one is
+    used, and the board is not restored after the move.
+    Returns None if the search's time is over.
+    """
+    search_trace = []
+    coord1, coord2 = move
+    unmake = killer_list is not None
+    if killer_list is None:
+        killer_list = Killer_Moves()
+    _, _, result, game_end, _, captured_piece, leaving_piece, old_hash, _ = \
+        make_pseudomove(
+            board, coord1, coord2, 0, params,
+            search_trace=search_trace, check_legal=False
+        )
+    if not game_end:
+        _, result, _, _ = negamax(
+            board, 1, -beta, -alpha, params, t_table, trace, killer_list,
+            search_trace
+        )
+        result = -float(result)  # Switch to player's view.
+    if unmake:
+        board.unmake_move(
+            coord1, coord2, captured_piece, leaving_piece, old_hash)
+    if search_stopped(params):
+        return None
+    return min(max(result, alpha), beta)
+
+
 def negamax(
     board, depth, alpha, beta, params=DEFAULT_SEARCH_PARAMS,
     t_table=None, trace=None, killer_list=None, search_trace=[]
@@ -665,6 +1377,14 @@ def negamax(
             killer_list=killer_list, search_trace=search_trace
             )
 
+    # Count the node, checking if time is over.
+    if check_search_control(params):
+        return None, DRAW, False, ON_GOING  # Result to be ignored.
+    # No principal variation is known from this node yet.
+    pv_table = params.get("pv_table")
+    if pv_table is not None:
+        pv_table.clear(depth)
+
     # 1. Register searched node, checking repetitions.
     if trace is not None:
         repetition = trace.register_searched_board(board, depth)
@@ -672,6 +1392,13 @@ def negamax(
             # The position already happenned in the game [excluding root node].
             return None, DRAW, True, DRAW_THREE_REPETITIONS
 
+    # 1.1 Mate-distance pruning: no line from here can end the game
+    # sooner than this node (a loss) or the next one (a win).
+    if depth > 0:
+        alpha, beta = mate_distance_window(alpha, beta, depth)
+        if alpha >= beta:
+            return None, alpha, False, ON_GOING  # [fail-hard cutoff]
+
     # 2. Check position in transposition table.
     alpha_orig = alpha
     value = t_table.retrieve(board.hash)
@@ -716,11 +1443,80 @@ def negamax(
     best_move = None
     best_result = -np.Infinity  # Value to store in transposition table.
     n_legal_moves_tried = 0
-
-    # 4.1 Null-move: not tried in negamax()
-    pass
-
-    # 4.2 Try hash-move (before generating pseudo-moves).
+    do_pvs = params.get("pvs", False)
+    history_table = params.get("history_table")
+    countermove_table = params.get("countermove_table")
+    lmr_reduction = params.get("lmr_reduction", 0)
+    if lmr_reduction and params["max_depth"] - depth >= \
+            max(LMR_MIN_DEPTH, lmr_reduction + 1):
+        # Late moves may be searched less deep (unless in check).
+        lmr_moves = params.get("lmr_moves", LMR_FULL_DEPTH_MOVES)
+        lmr_params = dict(
+            params,
+            max_depth=params["max_depth"] - lmr_reduction,
+            max_check_quiesc_depth=params["max_check_quiesc_depth"] -
+            lmr_reduction
+        )
+        player_prince = board.prince[board.turn]
+        if player_prince is not None and position_attacked(
+            board, player_prince.coord,
+            bd.BLACK if board.turn == bd.WHITE else bd.WHITE
+        ):
+            lmr_reduction = 0
+    else:
+        lmr_reduction = 0
+
+    # 4.1a Futility: near the leaves, a static evaluation far above beta
+    # prunes the node (reverse futility), and one far below alpha means
+    # quiet moves are not worth searching (futility pruning).
+    futility_value = None
+    depth_left = params["max_depth"] - depth
+    if params.get("futility_pruning", False) and \
+            futility_allowed(board, depth, alpha, beta, params):
+        static_value = evaluate_static(board, depth)
+        if depth_left <= REVERSE_FUTILITY_DEPTH and \
+                not is_end_score(beta) and \
+                board.piece_count[board.turn][bd.KNIGHT] > 0 and \
+                static_value - REVERSE_FUTILITY_MARGIN * depth_left >= beta:
+            # Prune the node [fail-hard beta cutoff].
+            return None, beta, False, ON_GOING
+        if depth_left == 1 and not is_end_score(alpha) and \
+                static_value + FUTILITY_MARGIN <= alpha:
+            futility_value = static_value + FUTILITY_MARGIN
+
+    # 4.1b Null-move: if passing the turn still fails high in a reduced
+    # search, so would a real move (null move pruning).
+    if params.get("null_move", False) and null_move_allowed(
+        board, depth, beta, params, search_trace
+    ):
+        null_params = dict(
+            params,
+            max_depth=params["max_depth"] - NULL_MOVE_REDUCTION,
+            max_check_quiesc_depth=params["max_check_quiesc_depth"] -
+            NULL_MOVE_REDUCTION
+        )
+        old_hash = board.make_null_move()
+        search_trace.append(None)
+        childs_move, result_i, game_end_i, game_status_i = \
+            negamax(
+                board, depth + 1, -beta, -beta + PVS_EPSILON,
+                null_params, t_table, trace, killer_list, search_trace
+            )
+        result_i = -float(result_i)  # Switch to player's view.
+        board.unmake_null_move(old_hash)
+        search_trace.pop()
+        if search_stopped(params):
+            return None, DRAW, False, ON_GOING  # Result to be ignored.
+        if result_i >= beta:
+            # Prune the node [fail-hard beta cutoff].
+            return None, beta, False, ON_GOING
+
+    # 4.2 Try hash-move (before generating pseudo-moves), or rather the
+    # move of last iteration's principal variation if still following it.
+    if pv_table is not None:
+        pv_move = pv_table.pv_move(depth, search_trace)
+        if pv_move is not None:
+            hash_move = pv_move
     if hash_move is not None:
         coord1, coord2 = hash_move
         # Try hash_move on board;
@@ -751,33 +1547,44 @@ def negamax(
         board.unmake_move(
             coord1, coord2, captured_piece, leaving_piece, old_hash)
         search_trace.pop()
+        if search_stopped(params):
+            return None, DRAW, False, ON_GOING  # Result to be ignored.
         if result_i >= beta:
             # Ignore rest of moves [fail-hard beta cutoff].
             # (No need to update transposition table with this known move.)
             # Update the list of killer moves if it's no capture.
             if board.board1d[coord2] is None:
                 killer_list.insert([coord1, coord2], depth)
+                if history_table is not None:
+                    history_table.insert(
+                        board.turn, [coord1, coord2],
+                        params["max_depth"] - depth
+                    )
+                if countermove_table is not None:
+                    countermove_table.insert(
+                        board.turn, search_trace, [coord1, coord2]
+                    )
             return [coord1, coord2], beta, False, ON_GOING
         if result_i > alpha:
             # Update move choice with this better one for player.
             best_move, alpha = [coord1, coord2], result_i
+            if pv_table is not None:
+                pv_table.update(depth, best_move, game_end_i)
 
-    # 4.3 Generate and explore existing pseudomoves.
-    moves, moves_count = generate_pseudomoves(board)
-    assert (moves_count > 0),\
-        "ERROR: No pseudomoves found despite game is not ended "\
-        "and MAX_DEPTH has not been reached."
-    # Remove already searched hash_move from pseudomoves list.
-    # Note: if hash_move is "Prince leaving", it won't be in 'moves'.
-    if hash_move is not None and hash_move[1] is not None:
-        moves.remove(hash_move)
-
-    # Preevaluate and sort pseudomoves.
+    # 4.3 Generate and explore legal moves (none if mate or stalemate),
+    # in stages and skipping the already searched hash_move.
     if killer_list is not None:
         k_moves = killer_list.retrieve(depth)
     else:
         k_moves = [None, None]
-    moves = pre_evaluate_pseudomoves(board, moves, k_moves)
+    if countermove_table is not None:
+        c_moves = countermove_table.retrieve(board.turn, search_trace)
+    else:
+        c_moves = [None, None]
+    moves = pick_moves(
+        board, hash_move, k_moves, history_table, c_moves,
+        params.get("see", False)
+    )
 
     # Explore each possible pseudomove.
     for pseudo_move in moves:  # [[24, 14], [24, 13]...]], [2, 3]...]
@@ -790,7 +1597,7 @@ def negamax(
             opponent_in_check = \
             make_pseudomove(
                 board, coord1, coord2, depth, params,
-                search_trace=search_trace
+                search_trace=search_trace, check_legal=False
             )
         # Check if it's legal.
         if is_legal_i:
@@ -802,12 +1609,47 @@ def negamax(
                 pass  # TODO: review / kill this code branch?
             else:
                 # We need to recursively search this move deeper.
-                childs_move, result_i, game_end_i, game_status_i = \
-                    negamax(
-                        board, depth + 1, -beta, -alpha,
-                        params, t_table, trace, killer_list, search_trace
-                    )
-                result_i = -float(result_i)  # Switch to player's view.
+                full_window_search = True
+                is_quiet = (
+                    lmr_reduction > 0 or futility_value is not None
+                ) and is_quiet_move(
+                    board, coord1, coord2, captured_piece, leaving_piece
+                )
+                # LMR: late quiet moves are searched less deep first.
+                is_reduced = is_quiet and lmr_reduction > 0 and \
+                    n_legal_moves_tried > lmr_moves and \
+                    alpha > -float("inf") and \
+                    pseudo_move not in k_moves
+                if futility_value is not None and is_quiet:
+                    # Futile: its bound is used instead of a search.
+                    result_i = futility_value
+                    full_window_search = is_reduced = False
+                elif is_reduced or do_pvs and n_legal_moves_tried > 1 and \
+                        alpha > -float("inf"):
+                    # PVS: try to prove it's no better than alpha (null
+                    # window), searching again only if it fails high
+                    # (or if it was reduced and beat alpha).
+                    childs_move, result_i, game_end_i, game_status_i = \
+                        negamax(
+                            board, depth + 1, -alpha - PVS_EPSILON, -alpha,
+                            lmr_params if is_reduced else params,
+                            t_table, trace, killer_list, search_trace
+                        )
+                    result_i = -float(result_i)  # Switch to player's view.
+                    if is_reduced:
+                        full_window_search = result_i > alpha
+                    else:
+                        full_window_search = alpha < result_i < beta
+                    full_window_search = full_window_search and \
+                        not search_stopped(params)
+                if full_window_search:
+                    childs_move, result_i, game_end_i, game_status_i = \
+                        negamax(
+                            board, depth + 1, -beta, -alpha,
+                            params, t_table, trace, killer_list,
+                            search_trace
+                        )
+                    result_i = -float(result_i)  # Switch to player's view.
             # Assess results from final position or search.
             if result_i > best_result:
                 best_move = [coord1, coord2]
@@ -816,6 +1658,8 @@ def negamax(
             board.unmake_move(
                 coord1, coord2, captured_piece, leaving_piece, old_hash)
             search_trace.pop()
+            if search_stopped(params):
+                return None, DRAW, False, ON_GOING  # Result to be ignored.
             if result_i >= beta:
                 # Ignore rest of pseudomoves [fail-hard beta cutoff].
                 # Update transposition table with best result found.
@@ -826,10 +1670,21 @@ def negamax(
                 # Update the list of killer moves if it's no capture.
                 if board.board1d[coord2] is None:
                     killer_list.insert([coord1, coord2], depth)
+                    if history_table is not None:
+                        history_table.insert(
+                            board.turn, [coord1, coord2],
+                            params["max_depth"] - depth
+                        )
+                    if countermove_table is not None:
+                        countermove_table.insert(
+                            board.turn, search_trace, [coord1, coord2]
+                        )
                 return [coord1, coord2], beta, False, ON_GOING
             if result_i > alpha:
                 # Update move choice with this better one for player.
                 best_move, alpha = [coord1, coord2], result_i
+                if pv_table is not None:
+                    pv_table.update(depth, best_move, game_end_i)
         else:
             # Simply 'unmake' the illegal move.
             board.unmake_move(
@@ -883,12 +1738,16 @@ def negamax(
         board.unmake_move(
             coord1, coord2, captured_piece, leaving_piece, old_hash)
         search_trace.pop()
+        if search_stopped(params):
+            return None, DRAW, False, ON_GOING  # Result to be ignored.
         # Update transposition table with best result found.
         t_table.update_values(
             board, depth, best_result, alpha_orig, beta,
             [coord1, coord2], params["max_depth"] - depth
         )
         # No update to list of killer moves (it's a forced move).
+        if pv_table is not None:
+            pv_table.update(depth, best_move)
         # Return results.
         return best_move, best_result, False, ON_GOING
 
@@ -896,6 +1755,77 @@ def negamax(
     return None, DRAW, True, DRAW_STALEMATE
 
 
+def is_quiet_move(board, coord1, coord2, captured_piece, leaving_piece):
+    """
+    Check if a move just made on the board can be searched less deep
+    by late move reductions: no captures or promotions, no Prince or
+    Soldier moves towards the crown, and no checks to the opponent.
+    """
+    if captured_piece is not None or leaving_piece is not None:
+        return False
+    moving_piece = board.board1d[coord2]
+    if moving_piece.type != bd.KNIGHT:
+        distance = bd.piece_color_distance_to_crown[moving_piece.type][
+            moving_piece.color
+        ]
+        if distance[coord2] < distance[coord1]:
+            return False
+    opponent_prince = board.prince[board.turn]
+    return opponent_prince is None or not position_attacked(
+        board, opponent_prince.coord, moving_piece.color
+    )
+
+
+def null_move_allowed(board, depth, beta, params, search_trace):
+    """
+    Check if a null move can be tried in a node of negamax():
+    - Not at the root, nor right after another null move.
+    - With a finite beta to fail high against.
+    - With enough depth left for a reduced search.
+    - Not in check, as passing would then be illegal.
+    - Not if the player only has Prince and Soldiers, where zugzwang
+      (and stalemate) are frequent.
+    """
+    if depth == 0 or (search_trace and search_trace[-1] is None) or \
+            beta == float("inf") or \
+            params["max_depth"] - depth <= NULL_MOVE_REDUCTION:
+        return False
+    player_side = board.turn
+    if board.piece_count[player_side][bd.KNIGHT] == 0:
+        return False
+    opponent_side = bd.BLACK if player_side == bd.WHITE else bd.WHITE
+    player_prince = board.prince[player_side]
+    return player_prince is None or not position_attacked(
+        board, player_prince.coord, opponent_side
+    )
+
+
+def mate_distance_window(alpha, beta, depth):
+    """
+    Narrow the alpha-beta window of a node at 'depth' to the end scores it
+    can still reach: losing right there, at worst, and winning with the
+    next move, at best. Once alpha >= beta, a shorter win than any line
+    below the node was already found, and it can be pruned.
+    """
+    alpha = max(alpha, OPPONENT_WINS + depth * END_DEPTH_PENALTY)
+    beta = min(beta, PLAYER_WINS - depth * END_DEPTH_PENALTY)
+    return alpha, beta
+
+
+def futility_allowed(board, depth, alpha, beta, params):
+    """
+    Check if a node of negamax() can be pruned by its static evaluation:
+    - Not at the root, and only with few plies left to search.
+    - With a finite alpha or beta to compare it to.
+    - Not in check, as the static evaluation would then be meaningless.
+    """
+    if depth == 0 or \
+            params["max_depth"] - depth > REVERSE_FUTILITY_DEPTH or \
+            alpha == -float("inf") and beta == float("inf"):
+        return False
+    return not prince_in_check(board)
+
+
 def quiesce_WIP(
     board, depth, alpha, beta, params=DEFAULT_SEARCH_PARAMS,
     t_table=None, trace=None, player_in_check=None, killer_list=None,
@@ -1279,6 +2209,14 @@ def quiesce(
                         DRAW_THREE_REPETITIONS
     """
 
+    # Count the node, checking if time is over.
+    if check_search_control(params):
+        return None, DRAW, False, ON_GOING  # Result to be ignored.
+    # No principal variation is known from this node yet.
+    pv_table = params.get("pv_table")
+    if pv_table is not None:
+        pv_table.clear(depth)
+
     # 1. Register searched node, checking repetitions.
     if trace is not None:
         repetition = trace.register_searched_board(board, depth)
@@ -1286,6 +2224,11 @@ def quiesce(
             # The position had already happenned in the game.
             return None, DRAW, True, DRAW_THREE_REPETITIONS
 
+    # 1.1 Mate-distance pruning (see negamax()).
+    alpha, beta = mate_distance_window(alpha, beta, depth)
+    if alpha >= beta:
+        return None, alpha, False, ON_GOING  # [fail-hard cutoff]
+
     # 2. Check position in transposition table.
     alpha_orig = alpha
     if t_table:
@@ -1345,6 +2288,7 @@ def quiesce(
         player_in_check = not is_legal(board)
         board.turn = player_side  # Restablish original turn.
 
+    stand_pat = None
     if not player_in_check:
         # A "stand pat" is possible; evaluate it.
         best_move = None
@@ -1355,9 +2299,10 @@ def quiesce(
         if result_i > alpha:
             # Update move choice with this better one for player.
             alpha = result_i
+        if params.get("delta_pruning", False):
+            stand_pat = result_i
 
-    # 4.2 Try hash-move (before generating pseudo-moves),
-    # regardless of whether it's dynamic or not.
+    # 4.2 Try hash-move (before generating pseudo-moves), if it's dynamic.
     if hash_move is not None:
         coord1, coord2 = hash_move
         # Try hash_move on board;
@@ -1368,43 +2313,55 @@ def quiesce(
             opponent_in_check = \
             make_pseudomove(
                 board, coord1, coord2, depth, params,
+                check_dynamic=not(player_in_check),
                 search_trace=search_trace
             )
-        # Assumption: it's legal.
-        n_legal_moves_tried += 1
-        n_legal_moves_found += 1
-        # Unless it led to a final position, search the move.
-        if not game_end_i:
-            childs_move, result_i, game_end_i, game_status_i = \
-                quiesce(
-                    board, depth + 1, -beta, -alpha,
-                    params, t_table, trace, killer_list=killer_list,
-                    search_trace=search_trace
-                )
-            result_i = -float(result_i)  # Switch to player's view.
-        # Assess results from final position or search.
-        if result_i > best_result:
-            best_move = [coord1, coord2]
-            best_result = result_i
-        # And 'unmake' the move.
-        board.unmake_move(
-            coord1, coord2, captured_piece, leaving_piece, old_hash)
-        search_trace.pop()
-        if result_i >= beta:
-            # Ignore rest of moves [fail-hard beta cutoff].
-            # (No need to update transposition table with this known move.)
-            # Update the list of killer moves if it's no capture.
-            if board.board1d[coord2] is None:
-                killer_list.insert([coord1, coord2], depth)
-            return [coord1, coord2], beta, False, ON_GOING
-        if result_i > alpha:
-            # Update move choice with this better one for player.
-            best_move, alpha = [coord1, coord2], result_i
+        if not (is_dynamic_i or player_in_check):
+            # A quiet move, e.g. stored by a null-window search in
+            # negamax(): left to the moves below, which skip it (else it
+            # could be repeated endlessly with no Gametrace to detect it).
+            board.unmake_move(
+                coord1, coord2, captured_piece, leaving_piece, old_hash)
+            search_trace.pop()
+            hash_move = None
+        else:
+            # Assumption: it's legal.
+            n_legal_moves_tried += 1
+            n_legal_moves_found += 1
+            # Unless it led to a final position, search the move.
+            if not game_end_i:
+                childs_move, result_i, game_end_i, game_status_i = \
+                    quiesce(
+                        board, depth + 1, -beta, -alpha,
+                        params, t_table, trace, killer_list=killer_list,
+                        search_trace=search_trace
+                    )
+                result_i = -float(result_i)  # Switch to player's view.
+            # Assess results from final position or search.
+            if result_i > best_result:
+                best_move = [coord1, coord2]
+                best_result = result_i
+            # And 'unmake' the move.
+            board.unmake_move(
+                coord1, coord2, captured_piece, leaving_piece, old_hash)
+            search_trace.pop()
+            if search_stopped(params):
+                return None, DRAW, False, ON_GOING  # Result to be ignored.
+            if result_i >= beta:
+                # Ignore rest of moves [fail-hard beta cutoff].
+                # (No need to update transposition table with this move.)
+                # Update the list of killer moves if it's no capture.
+                if board.board1d[coord2] is None:
+                    killer_list.insert([coord1, coord2], depth)
+                return [coord1, coord2], beta, False, ON_GOING
+            if result_i > alpha:
+                # Update move choice with this better one for player.
+                best_move, alpha = [coord1, coord2], result_i
+                if pv_table is not None:
+                    pv_table.update(depth, best_move, game_end_i)
 
-    # 4.3. Generate and explore dynamic pseudomoves.
-    moves, moves_count = generate_pseudomoves(board)
-    assert(moves_count > 0),\
-        "ERROR: No pseudomoves found despite game is not ended."
+    # 4.3. Generate and explore dynamic legal moves.
+    moves, moves_count = generate_legal_moves(board)
 
     # Remove already searched hash_move from list.
     # Note: if hash_move is "Prince leaving", it won't be in 'moves'.
@@ -1416,11 +2373,19 @@ def quiesce(
         k_moves = killer_list.retrieve(depth)
     else:
         k_moves = [None, None]
-    moves = pre_evaluate_pseudomoves(board, moves, k_moves)
+    moves = pre_evaluate_pseudomoves(
+        board, moves, k_moves, params.get("history_table"),
+        see=params.get("see", False)
+    )
 
     # Explore each possible pseudomove.
+    see_pruning = params.get("see", False) and not player_in_check
     for pseudo_move in moves:  # [[24, 14], [24, 13]...]], [2, 3]...]
         coord1, coord2 = pseudo_move  # [24, 14]
+        # SEE pruning: captures losing material in the exchange.
+        losing_capture = see_pruning and \
+            board.board1d[coord2] is not None and \
+            static_exchange_evaluation(board, coord1, coord2) < 0
         # Try pseudomove 'i' on board;
         # if it leads to a game end, we can use result_i.
         is_legal_i, is_dynamic_i, \
@@ -1430,10 +2395,21 @@ def quiesce(
             make_pseudomove(
                 board, coord1, coord2, depth, params,
                 check_dynamic=not(player_in_check),
-                search_trace=search_trace)
+                search_trace=search_trace, check_legal=False)
         # Check if it's legal.
         if is_legal_i:
             n_legal_moves_found += 1
+            # Delta / SEE pruning: a plain capture that can't raise alpha
+            # even with the captured piece's value, or that loses material
+            # in the exchange, is not searched (unless it's a check, which
+            # may lead to a mate or a crowning).
+            if captured_piece is not None and leaving_piece is None and \
+                    not game_end_i and (
+                        losing_capture or stand_pat is not None and
+                        stand_pat + piece_code_value[captured_piece.code] +
+                        DELTA_MARGIN <= alpha
+                    ) and not prince_in_check(board):
+                is_dynamic_i = False
             # Check if it's a dynamic move.
             if is_dynamic_i or player_in_check:
                 # A move worth searching in quiesce().
@@ -1460,6 +2436,8 @@ def quiesce(
                 board.unmake_move(
                     coord1, coord2, captured_piece, leaving_piece, old_hash)
                 search_trace.pop()
+                if search_stopped(params):
+                    return None, DRAW, False, ON_GOING  # Result to be ignored.
                 if result_i >= beta:
                     # Ignore rest of pseudomoves [fail hard beta cutoff].
                     # Update transposition table with best result found.
@@ -1474,6 +2452,8 @@ def quiesce(
                 if result_i > alpha:
                     # Update move choice with this better one for player.
                     best_move, alpha = [coord1, coord2], result_i
+                    if pv_table is not None:
+                        pv_table.update(depth, best_move, game_end_i)
             else:
                 # Simply 'unmake' the not-searched move.
                 board.unmake_move(
@@ -1523,12 +2503,16 @@ def quiesce(
         board.unmake_move(
             coord1, coord2, captured_piece, leaving_piece, old_hash)
         search_trace.pop()
+        if search_stopped(params):
+            return None, DRAW, False, ON_GOING  # Result to be ignored.
         # Update transposition table with best result found.
         t_table.update_values(
             board, depth, best_result, alpha_orig, beta,
             [coord1, coord2], depth_searched=0
         )
         # No update to list of killer moves (it's a forced move).
+        if pv_table is not None:
+            pv_table.update(depth, best_move)
         # Return results.
         return best_move, best_result, False, ON_GOING
 
@@ -1962,31 +2946,37 @@ def evaluate_terminal(board, depth):
 
 def position_attacked(board, pos, attacking_side):
 
-    attacked = False
-    # Loop over each of the up to 6 directions till attacked == True
-    for positions in bd.knight_moves[pos]:  # [1, 2, 3, 4, 5, ...] for pos = 0
-        # Get the closest piece in that direction and its distance.
-        pieces = board.board1d[positions]  # [None, None, piece_1, None, ...]
-        try:
-            piece_pos = np.where(pieces)[0][0]  # 2
-            closest_piece = pieces[piece_pos]  # piece_1
-
-            if closest_piece.color == attacking_side:
-                # Keep checking.
-                if closest_piece.type == bd.KNIGHT:  # A Knight.
-                    return True
-                elif closest_piece.type == bd.SOLDIER:  # A Soldier
-                    # Check proximity and position in its kingdom.
-                    attacked = (piece_pos == 0) or \
-                        (piece_pos == 1 and
-                         bd.kingdoms[attacking_side][positions[piece_pos]])
-                else:  # If it's a Prince; check if it's adjacent.
-                    attacked = (piece_pos == 0)
-            if attacked:
-                return True  # No need to check the other directions.
-        except IndexError:
-            pass  # No pieces found in that direction; do nothing.
-    return attacked
+    # Use the attack map of the side if it's already available.
+    attack_map = board.attack_maps[attacking_side]
+    if attack_map is not None:
+        return (attack_map & bd.coord_bit[pos]) != 0
+
+    attackers = board.color_mask[attacking_side]
+    # 1. Any attacking piece adjacent to 'pos'.
+    if bd.simple_moves_mask[pos] & attackers:
+        return True
+    occupied = board.color_mask[bd.WHITE] | board.color_mask[bd.BLACK]
+    # 2. A Soldier in its kingdom, 2 steps away with a free coord between.
+    soldiers = board.piece_mask[attacking_side][bd.SOLDIER]
+    if soldiers & bd.soldier_jumps_mask[attacking_side][pos]:
+        for step_bit, jump_bit in bd.soldier_jumps[attacking_side][pos]:
+            if soldiers & jump_bit and not occupied & step_bit:
+                return True
+    # 3. A Knight as the closest piece in any direction.
+    knights = board.piece_mask[attacking_side][bd.KNIGHT]
+    if knights & bd.knight_moves_mask[pos]:
+        return (bd.rays_reach(bd.knight_reach[pos], occupied) & knights) != 0
+    return False
+
+
+def prince_in_check(board):
+    """
+    Check if the Prince of the side to move is attacked.
+    """
+    prince = board.prince[board.turn]
+    opponent_side = bd.BLACK if board.turn == bd.WHITE else bd.WHITE
+    return prince is not None and \
+        position_attacked(board, prince.coord, opponent_side)
 
 
 def position_attacked_NEW(board, pos, attacking_side):
@@ -2036,44 +3026,247 @@ def generate_pseudomoves(board, kill_moves=None):
         moves_count:integer - the total number of pseudomoves.
     """
     moves = []
-    moves_count = 0
+    own_mask = board.color_mask[board.turn]
+    occupied = board.color_mask[bd.WHITE] | board.color_mask[bd.BLACK]
     # Iterate over every piece from the moving side.
     for piece in board.pieces[board.turn]:
-        # Obtain list with piece moves | lists of moves
-        p_moves = bd.piece_moves[piece.type][piece.color][piece.coord]
-        if type(p_moves[0]) == list:
-            # List of moves lists (K or S in kingdom): [[1, 2...], [13, 15...]]
-            new_moves = set()  # A set with the moves to find for this 'piece'.
-            for moves_list in p_moves:  # [1, 2, 3, 4,...]
-                # Get the closest piece in that direction and its distance.
-                pieces = board.board1d[moves_list]  # [None, None, piece_1,...]
-                try:
-                    piece_pos = np.where(pieces)[0][0]  # 2
-                    closest_piece = pieces[piece_pos]  # piece_1
-                    if closest_piece.color == piece.color:
-                        # Add moves till closest_piece [EXcluding it].
-                        new_moves = new_moves.union(moves_list[:piece_pos])
-                    else:
-                        # Add moves till closest_piece [INcluding it].
-                        new_moves = new_moves.union(moves_list[:piece_pos + 1])
-                except IndexError:
-                    # No pieces in that direction: add all moves.
-                    new_moves = new_moves.union(moves_list)
-            new_moves = list(new_moves)
-        else:
+        # Obtain rays with piece moves, if any.
+        reach_table = bd.piece_reach[piece.type][piece.color][piece.coord]
+        if reach_table is None:
             # List of moves (P, or S out of kingdom): [1, 2, 3...]
-            new_moves = [p for p in p_moves if board.board1d[p] is None
-                         or board.board1d[p].color != piece.color]
+            new_moves = \
+                bd.piece_moves_mask[piece.type][piece.color][piece.coord] \
+                & ~own_mask
+        else:
+            # List of moves lists (K or S in kingdom): [[1, 2...], [13, 15...]]
+            new_moves = bd.rays_reach(reach_table, occupied) & ~own_mask
 
         # Update main list.
-        piece_moves_list = [[piece.coord, x] for x in new_moves]
-        moves += piece_moves_list
-        moves_count += len(piece_moves_list)
+        moves += [[piece.coord, x] for x in ut.mask_2_coords(new_moves)]
+
+    return moves, len(moves)
+
+
+def attackers_to(board, pos, attacking_side, occupied):
+    """
+    Obtain the pieces of a side attacking a position, given the occupancy
+    of the board (which may differ from the board's, e.g. after a move).
+
+    Input:
+        board:          Board - the position with the attacking pieces.
+        pos:            int - the coord attacked.
+        attacking_side: int - the side of the attacking pieces.
+        occupied:       int - bitboard of all occupied coords to consider.
+
+    Output:
+        attackers:      int - bitboard of the attacking pieces' coords.
+    """
+    # 1. Any attacking piece adjacent to 'pos'.
+    attackers = bd.simple_moves_mask[pos] & board.color_mask[attacking_side]
+    # 2. Soldiers in their kingdom, 2 steps away with a free coord between.
+    soldiers = board.piece_mask[attacking_side][bd.SOLDIER]
+    if soldiers & bd.soldier_jumps_mask[attacking_side][pos]:
+        for step_bit, jump_bit in bd.soldier_jumps[attacking_side][pos]:
+            if soldiers & jump_bit and not occupied & step_bit:
+                attackers |= jump_bit
+    # 3. Knights as the closest piece in any direction.
+    knights = board.piece_mask[attacking_side][bd.KNIGHT]
+    if knights & bd.knight_moves_mask[pos]:
+        attackers |= bd.rays_reach(bd.knight_reach[pos], occupied) & knights
+    return attackers
+
+
+def static_exchange_evaluation(board, coord1, coord2):
+    """
+    Estimate the material won by the playing side with a capture, resolving
+    the whole sequence of captures on coord2 (by the least valuable piece
+    each time, as long as it pays off) with no search.
 
-    return moves, moves_count
+    Input:
+        board:      Board - the position before the capture.
+        coord1:     int - coord of the capturing piece.
+        coord2:     int - coord of the captured piece.
 
+    Output:
+        gain:       int - the balance of the exchange in piece weights,
+                    e.g. 1 for Soldier x Soldier, with no recapture,
+                    -9 for Knight x Soldier, recaptured by a Soldier.
 
-def pre_evaluate_pseudomoves(board, moves, k_moves=[None, None]):
+    Not covered: promotions, and pinned pieces (taken as free to capture).
+    """
+    target_bit = bd.coord_bit[coord2]
+    occupied = (board.color_mask[bd.WHITE] | board.color_mask[bd.BLACK]) & \
+        ~bd.coord_bit[coord1]
+    gains = [piece_code_value[board.boardcode[coord2]]]
+    piece_value = piece_code_value[board.boardcode[coord1]]
+    side = bd.WHITE if board.turn == bd.BLACK else bd.BLACK
+    while True:
+        # The least valuable piece of 'side' recapturing on coord2.
+        attackers = attackers_to(board, coord2, side, occupied) & occupied
+        if not attackers:
+            break
+        for piece_type in (bd.SOLDIER, bd.KNIGHT, bd.PRINCE):
+            type_attackers = attackers & board.piece_mask[side][piece_type]
+            if type_attackers:
+                break
+        other_side = bd.WHITE if side == bd.BLACK else bd.BLACK
+        from_bit = type_attackers & -type_attackers
+        if piece_type == bd.PRINCE and attackers_to(
+            board, coord2, other_side, occupied & ~from_bit
+        ) & occupied & ~target_bit:
+            break  # A Prince can't capture a defended piece.
+        gains.append(piece_value - gains[-1])
+        piece_value = piece_weights[bd.WHITE][bd.WHITE][piece_type]
+        occupied &= ~from_bit
+        side = other_side
+    # Each side stops capturing once it would lose on doing so.
+    for i in range(len(gains) - 1, 0, -1):
+        gains[i - 1] = -max(-gains[i - 1], gains[i])
+    return int(gains[0])
+
+
+def pseudomove_is_legal(board, coord1, coord2):
+    """
+    Check if a pseudomove is legal by making and unmaking it.
+    """
+    captured_piece, leaving_piece, old_hash = board.make_move(coord1, coord2)
+    legal = is_legal(board)
+    board.unmake_move(coord1, coord2, captured_piece, leaving_piece, old_hash)
+    return legal
+
+
+def generate_legal_moves(board, targets=bd.ALL_COORDS_MASK):
+    """
+    Generate a list of legal moves for the playing side, the same
+    pseudomoves from generate_pseudomoves() that is_legal() would accept
+    once made, but with no need to make them:
+    -   Prince moves to coords not attacked once it's moved.
+    -   If in check by one piece, other pieces only capture it or block it.
+        If in check by two pieces, only Prince moves.
+    -   Pinned pieces only move along the ray pinning them
+        (or capture the pinning piece).
+    -   No Soldier promotion while the player still has a Prince.
+
+    Input:
+        board:      Board - The game position to generate moves on.
+        targets:    int - bitboard of the coords where moves may end,
+                    e.g. the opponent's pieces to generate only captures.
+
+    Output:
+        moves:      list of pairs of ['from', 'to'] int values,
+                    each being the two integer coordinates of a move.
+                    E. g. [[24, 14], [24, 13]...]], [2, 3]...]
+        moves_count:integer - the total number of legal moves.
+    """
+    player_side = board.turn
+    opponent_side = bd.WHITE if player_side == bd.BLACK else bd.BLACK
+    prince = board.prince[player_side]
+
+    if prince is None or board.piece_count[player_side][bd.PRINCE] > 1:
+        # No Prince: only a promotion could be illegal (its new Prince
+        # being attacked); otherwise, an illegal board: test every move.
+        moves, _ = generate_pseudomoves(board)
+        prince_position = board.prince_position[player_side]
+        moves = [
+            m for m in moves
+            if bd.coord_bit[m[1]] & targets and (
+                (prince is None and m[1] != prince_position) or
+                pseudomove_is_legal(board, m[0], m[1])
+            )
+        ]
+        return moves, len(moves)
+
+    moves = []
+    own_mask = board.color_mask[player_side]
+    occupied = own_mask | board.color_mask[opponent_side]
+    prince_coord = prince.coord
+    prince_bit = bd.coord_bit[prince_coord]
+
+    # 1. Prince moves: the destination must not be attacked with the
+    # Prince moved there (e.g. it can't step back along a Knight's ray).
+    occupied_no_prince = occupied & ~prince_bit
+    for coord2 in ut.mask_2_coords(
+        bd.simple_moves_mask[prince_coord] & ~own_mask & targets
+    ):
+        bit2 = bd.coord_bit[coord2]
+        # A piece captured at coord2 doesn't attack anymore.
+        if not attackers_to(
+            board, coord2, opponent_side, occupied_no_prince | bit2
+        ) & ~bit2:
+            moves.append([prince_coord, coord2])
+
+    # 2. Check evasions: coords where other pieces can move.
+    checkers = attackers_to(board, prince_coord, opponent_side, occupied)
+    if checkers == 0:
+        evasion_mask = bd.ALL_COORDS_MASK
+    elif checkers & (checkers - 1) == 0:
+        # A single checker: capture it or block its ray.
+        checker_coord = checkers.bit_length() - 1
+        evasion_mask = \
+            checkers | bd.between_mask[prince_coord][checker_coord]
+    else:
+        # Double check: only the Prince can move.
+        return moves, len(moves)
+
+    # 3. Pinned pieces: own pieces that are the only ones between
+    # the Prince and an enemy Knight (or a Soldier jumping from its kingdom).
+    pinned = {}
+    opponent_knights = board.piece_mask[opponent_side][bd.KNIGHT]
+    opponent_soldiers = board.piece_mask[opponent_side][bd.SOLDIER]
+    if bd.knight_moves_mask[prince_coord] & \
+       (opponent_knights | opponent_soldiers):
+        for ray in bd.knight_moves[prince_coord]:
+            pinned_coord = None
+            for i, coord in enumerate(ray):
+                bit = bd.coord_bit[coord]
+                if occupied & bit:
+                    if pinned_coord is None:
+                        if not own_mask & bit:
+                            break  # An enemy piece: no pin on this ray.
+                        pinned_coord = coord
+                    else:
+                        if opponent_knights & bit:
+                            # Move along the ray or capture the Knight.
+                            pin_mask = bit | \
+                                bd.between_mask[prince_coord][coord]
+                        elif i == 1 and opponent_soldiers & bit and \
+                                bd.kingdoms[opponent_side][coord]:
+                            # Only capture the Soldier.
+                            pin_mask = bit
+                        else:
+                            break
+                        # Rays may share their first coord: a piece
+                        # there can be pinned along both.
+                        pinned[pinned_coord] = pin_mask & \
+                            pinned.get(pinned_coord, bd.ALL_COORDS_MASK)
+                        break
+
+    # 4. Moves of the rest of pieces.
+    promotion_bit = bd.coord_bit[board.prince_position[player_side]]
+    for piece in board.pieces[player_side]:
+        if piece is prince:
+            continue
+        reach_table = bd.piece_reach[piece.type][piece.color][piece.coord]
+        if reach_table is None:
+            new_moves = \
+                bd.piece_moves_mask[piece.type][piece.color][piece.coord]
+        else:
+            new_moves = bd.rays_reach(reach_table, occupied)
+        new_moves &= ~own_mask & evasion_mask & targets
+        if piece.coord in pinned:
+            new_moves &= pinned[piece.coord]
+        if piece.type == bd.SOLDIER:
+            # No second Prince.
+            new_moves &= ~promotion_bit
+        moves += [[piece.coord, x] for x in ut.mask_2_coords(new_moves)]
+
+    return moves, len(moves)
+
+
+def pre_evaluate_pseudomoves(
+    board, moves, k_moves=[None, None], history_table=None,
+    c_moves=[None, None], see=False
+):
     """
     Given a list of pseudomoves on a board, sort them for optimal seach.
 
@@ -2082,6 +3275,13 @@ def pre_evaluate_pseudomoves(board, moves, k_moves=[None, None]):
         moves:      a list of moves, e.g. [[1, 13], [1, 14], [26, 16]...]
         k_moves:    a list of TWO killer moves that might appear in 'moves'.
                     E.g: [None, None]; [[1, 13], None]; [[23, 24], [1, 14]]
+        history_table:
+                    History_table - scores of non captures equally
+                    valued otherwise (or None).
+        c_moves:    the countermove and follow-up move that might appear
+                    in 'moves' (see Countermove_table), e.g. [None, None].
+        see:        Boolean - whether captures are valued by the whole
+                    exchange (static_exchange_evaluation()).
 
     Output:
         ev_moves:   a new list of moves, e.g. [[26, 16], [1, 13], [1, 14]...]
@@ -2090,9 +3290,11 @@ def pre_evaluate_pseudomoves(board, moves, k_moves=[None, None]):
     1.  Winning / neutral captures, sorted by decreasing expected gain:
         1.a) if captured piece is not protected: full piece value.
         1.b) if captured piece is protected: piece value - own piece value.
-    2.  Killer moves found in list (if any).
+        [With 'see', the result of the exchange in both cases.]
+    2.  Killer moves found in list (if any); then countermove and
+        follow-up move.
     3.  [If no enemy Knights] Prince and Soldiers approaches to the crown.
-    4.  Non capture moves (unsorted).
+    4.  Non capture moves (sorted by history table, if any).
     5.  Losing captures, sorted by increasing expected loss (same algorithm).
 
     Not covered:
@@ -2103,14 +3305,18 @@ def pre_evaluate_pseudomoves(board, moves, k_moves=[None, None]):
     # Extend array with columns for evaluations.
     # - columns 0, 1: coord1 and coord2 of the move (coord2 is not None).
     # - column 2: move priority (higher value => higher priority).
+    # - column 3: history of non captures, to break ties.
 
     if moves != []:
         attacking_side = bd.WHITE if board.turn == bd.BLACK else bd.BLACK
         # Determine endgame condition (player has no Knights).
         is_endgame = board.piece_count[attacking_side][bd.KNIGHT] == 0
+        # Coords defended by the opponent.
+        attacked = np.zeros(bd.N_POSITIONS, dtype=np.intp)
+        attacked[ut.mask_2_coords(board.attack_map(attacking_side))] = 1
 
         # Initialize array with moves on columns '0' and '1'.
-        ev_moves = np.zeros((len(moves), 3), dtype=np.intp)
+        ev_moves = np.zeros((len(moves), 4), dtype=np.intp)
         ev_moves[:, 0:2] = moves
 
         # Extract killer moves variables:
@@ -2122,19 +3328,51 @@ def pre_evaluate_pseudomoves(board, moves, k_moves=[None, None]):
             k3, k4 = k_moves[1]
         else:
             k3, k4 = None, None
+        # Bonus of non captures: killer, countermove, follow-up move.
+        quiet_bonus = v_is_killer(
+            ev_moves[:, 0], ev_moves[:, 1], k1, k2, k3, k4
+        ) * KILLER_BONUS
+        for c_move, bonus in zip(
+            c_moves, [COUNTERMOVE_BONUS, FOLLOWUP_BONUS]
+        ):
+            if c_move is not None:
+                quiet_bonus = np.where(
+                    (quiet_bonus == 0) &
+                    (ev_moves[:, 0] == c_move[0]) &
+                    (ev_moves[:, 1] == c_move[1]),
+                    bonus, quiet_bonus
+                )
 
         # Estimate the value captured by each move in column '2'.
         ev_moves[:, 2] = piece_code_value[
             board.boardcode[ev_moves[:, 1]]
         ]
+        # History of non captures in column '3'.
+        if history_table is not None:
+            ev_moves[:, 3] = np.where(
+                ev_moves[:, 2] > 0, 0,
+                -history_table.table[
+                    board.turn, ev_moves[:, 0], ev_moves[:, 1]
+                ]
+            )
 
         # For capturing moves, correct outcome in column '2',
         # checking whether the opponent defends coord2.
+        if see:
+            exchange = np.array([
+                static_exchange_evaluation(board, coord1, coord2)
+                if value > 0 else 0
+                for coord1, coord2, value, _ in ev_moves
+            ], dtype=np.intp)
+        else:
+            exchange = ev_moves[:, 2] - attacked[ev_moves[:, 1]] * \
+                piece_code_value[board.boardcode[ev_moves[:, 0]]]
 
         # Moves sorting:
         # 1a. good captures <- 10 x (capturing result) + 50   (>= 150)
         # 1b. even captures <- 10 x (capturing result) + 50   (= 50)
         # 2. killer moves <- 30                              (= 30)
+        #    countermove <- 20; follow-up move <- 15
         # 3. [endgame] moves towards the crown               (0, 12)
         # 4. non captures <- 0                              (= 0)
         # 5. bad captures <- 10 x (capturing result) + 5    (<= -50)
@@ -2145,42 +3383,26 @@ def pre_evaluate_pseudomoves(board, moves, k_moves=[None, None]):
             ev_moves[:, 2] = np.where(
                 ev_moves[:, 2] > 0,  # Condition: some value is captured.
                 # <full value> - <capturer's value> if coord2 is defended.
-                (
-                    ev_moves[:, 2] -
-                    v_position_attacked(
-                        board, ev_moves[:, 1], attacking_side
-                    ) *
-                    piece_code_value[board.boardcode[ev_moves[:, 0]]]
-                )*(-10) - 50,
+                exchange*(-10) - 50,
                 # Not a capture: value rest of conditions.
-                v_is_killer(
-                    ev_moves[:, 0], ev_moves[:, 1], k1, k2, k3, k4
-                )*(-30)
+                quiet_bonus
             )
         else:
             # Endgame preevaluation.
             ev_moves[:, 2] = np.where(
                 ev_moves[:, 2] > 0,  # Condition: some value is captured.
                 # <full value> - <capturer's value> if coord2 is defended.
-                (
-                    ev_moves[:, 2] -
-                    v_position_attacked(
-                        board, ev_moves[:, 1], attacking_side
-                    ) *
-                    piece_code_value[board.boardcode[ev_moves[:, 0]]]
-                )*(-10) - 50,
+                exchange*(-10) - 50,
                 # Not a capture: value rest of conditions.
-                v_is_killer(
-                    ev_moves[:, 0], ev_moves[:, 1], k1, k2, k3, k4
-                )*(-30) -
+                quiet_bonus -
                 (
                     bd.np_distance_to_crown[ev_moves[:, 1]] <
                     bd.np_distance_to_crown[ev_moves[:, 0]]
                 ) * \
                 (12 - bd.np_distance_to_crown[ev_moves[:, 1]])
             )
-        # Sort moves by higher evaluation.
-        ev_moves.view('i8, i8, i8').sort(order=['f2'], axis=0)
+        # Sort moves by higher evaluation, then history.
+        ev_moves.view('i8, i8, i8, i8').sort(order=['f2', 'f3'], axis=0)
         # ev_moves = ev_moves[::-1]
 
         # Discard auxiliary columns and return as a list.
@@ -2190,6 +3412,142 @@ def pre_evaluate_pseudomoves(board, moves, k_moves=[None, None]):
         return moves
 
 
+def pick_moves(
+    board, hash_move=None, k_moves=[None, None], history_table=None,
+    c_moves=[None, None], see=False
+):
+    """
+    Yield the legal moves of a position in stages, generating each stage
+    only when the previous one has been exhausted, so that a beta cutoff
+    saves the generation (and sorting) of the remaining moves.
+    Moves come in the same order as pre_evaluate_pseudomoves() sorts them.
+
+    Input:
+        board:      Board - the position where moves will be searched.
+        hash_move:  A move already tried (e.g. from the transposition table)
+                    that is not yielded again, or None.
+        k_moves:    a list of TWO killer moves that might be legal.
+                    E.g: [None, None]; [[1, 13], None]; [[23, 24], [1, 14]]
+        history_table:
+                    History_table - scores of non captures (or None).
+        c_moves:    the countermove and follow-up move that might be legal,
+                    E.g: [None, None]; [[1, 13], None]; [[23, 24], [1, 14]]
+        see:        Boolean - whether captures are valued by the whole
+                    exchange (static_exchange_evaluation()).
+
+    Output (yield):
+        move:       a list [coord1, coord2], e.g. [26, 16]
+
+    Stages:
+    1.  Captures better than any non capture (sorted).
+    2.  Killer moves, then countermove and follow-up move (if legal),
+        mixed with captures ranked alike.
+    3.  Non capture moves with the rest of captures (sorted; equally
+        valued non captures by history table, if any).
+    """
+    player_side = board.turn
+    attacking_side = bd.WHITE if player_side == bd.BLACK else bd.BLACK
+    # Determine endgame condition (opponent has no Knights).
+    is_endgame = board.piece_count[attacking_side][bd.KNIGHT] == 0
+    opponent_mask = board.color_mask[attacking_side]
+    occupied = board.color_mask[player_side] | opponent_mask
+    # Lowest (i.e. best) sorting value of a non-killer non capture.
+    quiets_bound = -12 if is_endgame else 0
+
+    history = None if history_table is None \
+        else history_table.table[player_side]
+
+    def quiet_value(coord1, coord2, bonus):
+        # Same values as in pre_evaluate_pseudomoves().
+        value = bonus
+        if is_endgame and \
+                bd.distance_to_crown[coord2] < bd.distance_to_crown[coord1]:
+            value -= 12 - bd.distance_to_crown[coord2]
+        return value
+
+    def quiet_history(coord1, coord2):
+        # Tie-breaker of non captures (0 for captures).
+        return 0 if history is None else -int(history[coord1, coord2])
+
+    # 1. Captures, valued by the result of the exchange.
+    attacked = board.attack_map(attacking_side)
+    captures, _ = generate_legal_moves(board, opponent_mask)
+    pending = []
+    for coord1, coord2 in captures:
+        if [coord1, coord2] != hash_move:
+            if see:
+                value = static_exchange_evaluation(board, coord1, coord2)
+            else:
+                value = piece_code_value[board.boardcode[coord2]]
+                if attacked & bd.coord_bit[coord2]:
+                    value -= piece_code_value[board.boardcode[coord1]]
+            pending.append((-10 * value - 50, 0, coord1, coord2))
+
+    # 2. Killer moves, countermove and follow-up move (with their bonus),
+    # only if legal non captures in this position.
+    killers, bonuses = [], []
+    for k_move, bonus in zip(
+        k_moves + c_moves,
+        [KILLER_BONUS, KILLER_BONUS, COUNTERMOVE_BONUS, FOLLOWUP_BONUS]
+    ):
+        if k_move is None or k_move == hash_move or k_move in killers:
+            continue
+        coord1, coord2 = k_move
+        if coord1 is None or coord2 is None:
+            continue
+        piece = board.board1d[coord1]
+        if piece is None or piece.color != player_side or \
+                occupied & bd.coord_bit[coord2]:
+            continue
+        reach_table = bd.piece_reach[piece.type][piece.color][coord1]
+        if reach_table is None:
+            reach = bd.piece_moves_mask[piece.type][piece.color][coord1]
+        else:
+            reach = bd.rays_reach(reach_table, occupied)
+        if reach & bd.coord_bit[coord2] and \
+                pseudomove_is_legal(board, coord1, coord2):
+            killers.append([coord1, coord2])
+            bonuses.append(bonus)
+
+    # Yield captures ranked above every killer move.
+    pending.sort()
+    killers_bound = min(
+        [
+            quiet_value(c1, c2, bonus)
+            for [c1, c2], bonus in zip(killers, bonuses)
+        ],
+        default=quiets_bound
+    )
+    i = 0
+    while i < len(pending) and pending[i][0] < killers_bound:
+        yield [pending[i][2], pending[i][3]]
+        i += 1
+    # Yield killers and captures ranked above every other non capture.
+    pending = pending[i:] + [
+        (quiet_value(c1, c2, bonus), quiet_history(c1, c2), c1, c2)
+        for [c1, c2], bonus in zip(killers, bonuses)
+    ]
+    pending.sort()
+    i = 0
+    while i < len(pending) and pending[i][0] < quiets_bound:
+        yield [pending[i][2], pending[i][3]]
+        i += 1
+
+    # 3. Non captures, with the rest of captures and killers.
+    quiets, _ = generate_legal_moves(board, ~occupied)
+    pending = pending[i:] + [
+        (
+            quiet_value(coord1, coord2, 0),
+            quiet_history(coord1, coord2), coord1, coord2
+        )
+        for coord1, coord2 in quiets
+        if [coord1, coord2] != hash_move and [coord1, coord2] not in killers
+    ]
+    pending.sort()
+    for _, _, coord1, coord2 in pending:
+        yield [coord1, coord2]
+
+
 def soldiers_lag(board, color):
     """
     Evaluate the amount of danger from Soldiers lagging behind their Prince,
@@ -2278,32 +3636,16 @@ def knights_mobility(board, color):
     Output:
         moves_count:integer - the total number of pseudomoves.
     """
-    # Obtain list of Knights for player with the 'color'.
-    knight_list = [p for p in board.pieces[color] if p.type == bd.KNIGHT]
+    own_mask = board.color_mask[color]
+    occupied = board.color_mask[bd.WHITE] | board.color_mask[bd.BLACK]
     moves_count = 0
 
     # Loop over all Knights.
-    for knight in knight_list:
-        # Obtain list with lists of moves.
-        p_moves = bd.piece_moves[bd.KNIGHT][color][knight.coord]
-        # List of moves lists: [[1, 2...], [13, 15...]]
-        moves = set()  # A set with the moves to find for this 'piece'.
-        for moves_list in p_moves:  # [1, 2, 3, 4,...]
-            # Get the closest piece in that direction and its distance.
-            pieces = board.board1d[moves_list]  # [None, None, piece_1,...]
-            try:
-                piece_pos = np.where(pieces)[0][0]  # 2
-                closest_piece = pieces[piece_pos]  # piece_1
-                if closest_piece.color == color:
-                    # Add moves till closest_piece [EXCLUDING it].
-                    moves = moves.union(moves_list[:piece_pos])
-                else:
-                    # Add moves till closest_piece [INCLUDING it].
-                    moves = moves.union(moves_list[:piece_pos + 1])
-            except IndexError:
-                # No pieces in that direction: add all moves.
-                moves = moves.union(moves_list)
-        moves_count += len(moves)
+    for knight in board.pieces[color]:
+        if knight.type == bd.KNIGHT:
+            moves = bd.rays_reach(bd.knight_reach[knight.coord], occupied) \
+                & ~own_mask
+            moves_count += bin(moves).count("1")
 
     return moves_count
 
@@ -2321,32 +3663,16 @@ def count_knight_pseudomoves(board, position, color):
     Output:
         moves_count:integer - the total number of pseudomoves.
     """
-    # Obtain list with lists of moves
-    p_moves = bd.piece_moves[bd.KNIGHT][color][position]
-    # List of moves lists: [[1, 2...], [13, 15...]]
-    moves = set()  # A set with the moves to find for this 'piece'.
-    for moves_list in p_moves:  # [1, 2, 3, 4,...]
-        # Get the closest piece in that direction and its distance.
-        pieces = board.board1d[moves_list]  # [None, None, piece_1,...]
-        try:
-            piece_pos = np.where(pieces)[0][0]  # 2
-            closest_piece = pieces[piece_pos]  # piece_1
-            if closest_piece.color == color:
-                # Add moves till closest_piece [EXCLUDING it].
-                moves = moves.union(moves_list[:piece_pos])
-            else:
-                # Add moves till closest_piece [INCLUDING it].
-                moves = moves.union(moves_list[:piece_pos + 1])
-        except IndexError:
-            # No pieces in that direction: add all moves.
-            moves = moves.union(moves_list)
+    occupied = board.color_mask[bd.WHITE] | board.color_mask[bd.BLACK]
+    moves = bd.rays_reach(bd.knight_reach[position], occupied) \
+        & ~board.color_mask[color]
 
-    return len(moves)
+    return bin(moves).count("1")
 
 
 def make_pseudomove(
     board, coord1, coord2, depth, params, check_dynamic=False,
-    search_trace=[]
+    search_trace=[], check_legal=True
 ):
     """
     Given a *legal* position, try to make a pseudomove.
@@ -2366,6 +3692,8 @@ def make_pseudomove(
         check_dynamic:  Boolean - whether dynamism of move must be
                         assessed.
         search_trace:   A list storing current search thread from root node.
+        check_legal:    Boolean - whether legality of the move must be
+                        checked (not needed for generate_legal_moves()).
 
     Output:
         is_legal:   Boolean - whether it was a legal move.
@@ -2423,7 +3751,7 @@ def make_pseudomove(
     search_trace.append([coord1, coord2])
 
     # Check if the move produced an illegal position.
-    if not is_legal(board):
+    if check_legal and not is_legal(board):
         return False, None, None, None, None, \
             captured_piece, leaving_piece, old_hash, opponent_in_check
 
@@ -2675,12 +4003,29 @@ def prince_has_moves(board, side_to_check):
     return False
 
 
+def is_end_score(evaluation):
+    # Whether an evaluation encodes a game end (a win for either side).
+    return abs(evaluation) >= END_SCORE_THRESHOLD
+
+
+def plies_to_end(evaluation, depth):
+    """
+    Return the plies from a node at 'depth' to the game end encoded in an
+    end score found there, e.g. 1 for PLAYER_WINS - 3 at depth 2 (or None
+    if 'evaluation' is not an end score).
+    """
+    if not is_end_score(evaluation):
+        return None
+    return int(round(
+        (PLAYER_WINS - abs(evaluation)) / END_DEPTH_PENALTY)) - depth
+
+
 def correct_eval_from_to_depth(evaluation, from_depth, to_depth):
     """
     Adjust some previous 'evaluation' calculated at depth 'from_depth'
     to new depth 'to_depth'.
     It takes into account the two different depth penalties:
-    - END_DEPTH_PENALTY assumed for |evaluation| >= PLAYER_WINS - 100
+    - END_DEPTH_PENALTY assumed for end scores (see is_end_score()),
     - STATIC_DEPTH_PENALTY for any other evaluation.
 
     Note: from_depth <= to_depth for evaluation to be worthy.
@@ -2690,7 +4035,7 @@ def correct_eval_from_to_depth(evaluation, from_depth, to_depth):
         # Depth correction required.
         depth_delta = to_depth - from_depth  # 4 - 2 = 2
         delta_sign = -np.sign(evaluation)  # -1 for positive evals
-        if abs(evaluation) >= PLAYER_WINS - 100:
+        if is_end_score(evaluation):
             # An end-game evaluation.
             evaluation += delta_sign * depth_delta * END_DEPTH_PENALTY
         else:
@@ -2702,7 +4047,6 @@ def correct_eval_from_to_depth(evaluation, from_depth, to_depth):
 
 ########################################################################
 # Vectorized functions (used within numpy).
-v_position_attacked = np.vectorize(position_attacked)
 v_is_killer = np.vectorize(is_killer)
 
 
@@ -2726,12 +4070,17 @@ if __name__ == '__main__':
     board.print_char()
 
     # Call  play().
+    search_metrics = {}
     best_move, result, game_end, game_status, \
         time_used, t_table_metrics = play(
-            board, params=parameters, trace=game_trace
+            board, params=parameters, trace=game_trace,
+            search_metrics=search_metrics
             )
 
     # Display results.
     ut.display_results(
         best_move, result, game_end, game_status
     )
+    print("PV:         {}".format(
+        " ".join([ut.move_2_txt(pv_move) for pv_move in search_metrics["pv"]])
+    ))
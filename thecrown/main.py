@@ -33,6 +33,21 @@ MACHINE_PLAYER = "machine"
 DEFAULT_WHITE_PLAYER = "crowny-iii"
 DEFAULT_BLACK_PLAYER = "crowny-iii"
 
+# Time control:
+# - Specs: "move:<secs>" per move; "game:<secs>[+<inc>]" per game,
+#   with an optional increment after each move.
+# - The clock only budgets the search time of each move: it is not
+#   enforced, so a side running out of time does not lose the game.
+Time_control = namedtuple("Time_control", ["kind", "base", "increment"])
+MOVE_TIMING = "move"
+GAME_TIMING = "game"
+# - Moves still to play estimated from the pieces on board (game phase).
+MOVES_TO_GO_BASE = 10
+MOVES_TO_GO_PER_PIECE = 2.5
+# - Max. share of the remaining clock spent on one move.
+MAX_CLOCK_SHARE = 0.25
+MIN_MOVE_TIME = 0.05  # Seconds.
+
 
 def run_the_crown(arg_list):
     """
@@ -45,12 +60,15 @@ def run_the_crown(arg_list):
         - 2nd string with a player's name -> Black player, e.g. "human"
         - A string ≠ player -> a board file to load, e.g. "position_03.cor"
         - integer -> Maximum number of moves to play, e.g. "10"
+        - A time control -> e.g. "move:5" or "game:300+2"
+          (used to budget the time per move; no loss on time)
 
         Default values:
         - White player: DEFAULT_WHITE_PLAYER
         - Black player: DEFAULT_BLACK_PLAYER
         - Board file:   None [initial position]
         - Num. moves:   Infinity
+        - Time control: None [no time limit]
 
     Returns:
         str:    gp.TXT_DRAW, gp.TXT_WHITE_WINS or gp.TXT_BLACK_WINS
@@ -65,6 +83,7 @@ def run_the_crown(arg_list):
     board_file_name = None
     white_player, black_player = None, None
     max_moves = np.Infinity
+    timing = None
     dir_path = os.path.dirname(os.path.realpath(__file__))
     players_list = glob.glob(f"{dir_path}{PLAYERS_PATH}*.yaml")
     players_list = [
@@ -77,6 +96,9 @@ def run_the_crown(arg_list):
         if str.isdigit(arg):
             # Limitation of number of moves to play.
             max_moves = int(arg)
+        elif ":" in arg:
+            # A time control.
+            timing = arg
         else:
             # Check if it's the name of a player.
             arg = str.lower(arg)
@@ -112,7 +134,7 @@ def run_the_crown(arg_list):
 
     # Play the game between the two players.
     game_result, end_status, rec_file_path, metrics_file_path = play_game(
-        board, board_file_name, player_set, max_moves)
+        board, board_file_name, player_set, max_moves, timing)
 
     return game_result, end_status, rec_file_path, metrics_file_path
 
@@ -161,10 +183,14 @@ def play_game(
                                 "file_name": "crowny-iii"
                                 "file": full path to player's .yaml file.
         max_moves (int):        The maximum number of moves to play.
-        timing (int):           None = no time limit;
-                                TODO: Define and implement:
-                                "move" = time limit per move.
-                                "game" = total time limit for the game.
+        timing (str):           None = no time limit; or else
+                                "move:<secs>" = time limit per move;
+                                "game:<secs>[+<inc>]" = total time limit
+                                per player for the game (sudden death),
+                                plus an increment after each move,
+                                e.g. "move:5", "game:300", "game:300+2".
+                                The clock only budgets the time of each
+                                move: no side loses on time.
         game_type (str):        Type of game played {"Game", "Match"}.
         round (int):            Number of round between these players.
         tourn_name (str):       Name of the tournament
@@ -206,27 +232,53 @@ def play_game(
         end_status = gp.ON_GOING
         game_trace = gp.Gametrace(board)
         # Initialize one transposition table and killer moves list per side.
-        t_table = [gp.Transposition_table(), gp.Transposition_table()]
+        t_table = [
+            gp.create_transposition_table(player)
+            if player["type"] == MACHINE_PLAYER else None
+            for player in player_set
+        ]
         killer_list = [gp.Killer_Moves(), gp.Killer_Moves()]
+        history_table = [gp.History_table(), gp.History_table()]
+        countermove_table = [gp.Countermove_table(), gp.Countermove_table()]
+        # Initialize players' clocks (seconds left), only shown
+        # when a human plays.
+        time_control = parse_timing(timing)
+        show_clock = any(
+            player["type"] != MACHINE_PLAYER for player in player_set
+        )
+        clock = [
+            float("inf") if time_control is None
+            or time_control.kind == MOVE_TIMING else time_control.base
+        ] * 2
         # Main game loop.
         while not game_end:
             # Main loop of the full game.
             board.print_char()
+            side = board.turn
+            move_time_0 = time.time()
             if player_set[board.turn]["type"] == MACHINE_PLAYER:
                 # A MACHINE plays this side.
-                move, result, game_end, end_status, time_used, tt_metrics =\
+                search_metrics = {}
+                move, result, game_end, end_status, time_used, tt_metrics = \
                     gp.play(
                         board,
                         params=player_set[board.turn],
-                        trace=game_trace, t_table=t_table[board.turn],
-                        killer_list=killer_list[board.turn]
+                        trace=game_trace,
+                        max_time=allocate_move_time(
+                            time_control, clock[board.turn], board
+                        ),
+                        t_table=t_table[board.turn],
+                        killer_list=killer_list[board.turn],
+                        history_table=history_table[board.turn],
+                        countermove_table=countermove_table[board.turn],
+                        search_metrics=search_metrics
                     )
                 # Print move metrics.
                 with open(metrics_file_path, "a") as metrics_file:
                     display_move_metrics(
                         board.turn, move, result,
                         player_set[board.turn],
-                        time_used, tt_metrics,
+                        time_used, tt_metrics, search_metrics,
                         game_trace, metrics_file
                     )
             else:
@@ -236,6 +288,13 @@ def play_game(
                     # Non-void value signals end.
                     player_quit = True
                     game_end = True
+            # Update the player's clock.
+            if time_control is not None and \
+                    time_control.kind == GAME_TIMING:
+                clock[side] += time_control.increment - \
+                    (time.time() - move_time_0)
+                if show_clock:
+                    print("Clock:  {:.2f} sec left".format(clock[side]))
             # Update outputs after move.
             if not game_end:
                 # Update board with move.
@@ -299,6 +358,66 @@ def play_game(
     return game_result_txt, end_status, rec_file_path, metrics_file_path
 
 
+def parse_timing(timing):
+    """
+    Interpret a time control specification.
+
+    Arguments:
+        timing (str):   None / "" = no time limit; "move:<secs>";
+                        "game:<secs>[+<inc>]"; or a number of seconds
+                        per move (e.g. as read from a .csv file).
+
+    Returns:
+        Time_control:   (kind, base, increment), e.g. ("game", 300.0, 2.0),
+                        or None if there's no time limit.
+    """
+    if timing is None or timing == "":
+        return None
+    if isinstance(timing, (int, float)):
+        return Time_control(MOVE_TIMING, float(timing), 0.0)
+    try:
+        kind, spec = str.lower(timing).split(":")
+        base, _, increment = spec.partition("+")
+        time_control = Time_control(
+            kind, float(base), float(increment) if increment else 0.0
+        )
+    except ValueError:
+        raise ValueError(f"Invalid time control: {timing}")
+    if time_control.kind not in (MOVE_TIMING, GAME_TIMING) or \
+            time_control.base <= 0 or time_control.increment < 0 or \
+            (time_control.kind == MOVE_TIMING and time_control.increment):
+        raise ValueError(f"Invalid time control: {timing}")
+    return time_control
+
+
+def allocate_move_time(time_control, clock, board):
+    """
+    Decide the time budget for the next move of the side to play.
+    With a game time limit, the clock left is shared among the moves
+    estimated to go, more of them the more pieces are on the board,
+    plus the increment, and never more than MAX_CLOCK_SHARE of it.
+
+    Arguments:
+        time_control (Time_control):    As returned by parse_timing().
+        clock (float):                  Seconds left for the game.
+        board (Board):                  The position to play.
+
+    Returns:
+        float:          Max. seconds for the move (inf = no limit).
+    """
+    if time_control is None:
+        return float("inf")
+    if time_control.kind == MOVE_TIMING:
+        return time_control.base
+    moves_to_go = \
+        MOVES_TO_GO_BASE + MOVES_TO_GO_PER_PIECE * board.piece_count.sum()
+    move_time = min(
+        clock / moves_to_go + time_control.increment,
+        clock * MAX_CLOCK_SHARE
+    )
+    return max(move_time, MIN_MOVE_TIME)
+
+
 def read_player_data(player_name):
     """
     Retrieve players' data from their .yaml files.
@@ -430,7 +549,8 @@ def display_start(board, player_set, board_name, rec_file):
             "MAX_DPTH CHECK_DPTH  RAND "
             "SIDE   MOVE       TIME  EVALUATION   DEPTH       "
             "NODES   TT_SIZE    TT_USE   TT_HITS  TT_COLLS   TT_UPDT"
-            "   FULL_SRCH  QUIESC_SRCH  TOP_20_LEVELS",
+            "  RE_SRCH FULL_WND  CM_HITS"
+            "   FULL_SRCH  QUIESC_SRCH  TOP_20_LEVELS  PV",
             file=metrics_file
         )
 
@@ -520,7 +640,7 @@ def display_quit_results(board, rec_file):
 
 def display_move_metrics(
     side, move, result, player_params, time_used, tt_metrics,
-    game_trace, metrics_file
+    search_metrics, game_trace, metrics_file
 ):
     """
     Display metrics of a move just produced by the program:
@@ -528,7 +648,7 @@ def display_move_metrics(
     - SIDE who played (White / Black)
     - MOVE played (algebraic notation).
     - TIME spent for the move (seconds).
-    - EVALuation (float).
+    - EVALuation (float), and plies to the game end if it's an end score.
     - MAX DEPTH reached (integer).
     - TOTAL NODES searched (integer).
     - TT_USAGE
@@ -536,7 +656,12 @@ def display_move_metrics(
     - TT_HITS
     - TT_COLLISIONS
     - TT_UPDATES
+    - RE_SRCH: searches repeated after failing on aspiration windows.
+    - FULL_WND: repeated with a full window, as last resort.
+    - CM_HITS: % of cutoffs by non captures found by the countermove
+      (in nodes where there was one).
     - Nodes searched in top 20 levels (list of integers).
+    - PV: principal variation, the line of play expected.
     """
     # Variables and player's search parameters:
     player_max_depth = player_params["max_depth"]
@@ -545,7 +670,13 @@ def display_move_metrics(
     player_hash = tt_metrics[0]
     hash_use = tt_metrics[1]
 
+    countermove_hit_rate = 100 * search_metrics["countermove_hits"] / \
+        max(search_metrics["countermove_tries"], 1)
+
     move_txt = ut.move_2_txt(move)
+    pv_txt = " ".join(
+        [ut.move_2_txt(pv_move) for pv_move in search_metrics["pv"]]
+    )
     nodes_count = game_trace.level_trace[
         game_trace.current_board_ply:, gp.NODE_COUNT_COL
     ].sum()
@@ -554,6 +685,16 @@ def display_move_metrics(
     print(
         "Move:   {} ({:+.5f})".format(move_txt, result)
     )
+    plies_to_end = gp.plies_to_end(result, 0)
+    if plies_to_end is not None:
+        print(
+            "End:    {} in {:d} plies".format(
+                "win" if result > 0 else "loss", plies_to_end
+            )
+        )
+    print(
+        "PV:     {}".format(pv_txt)
+    )
     print(
         "Params: full_depth={}, check_depth={}, hash_max={}, rnd={:0.2f}"
         .format(
@@ -566,12 +707,13 @@ def display_move_metrics(
     print(
         "Search: {:.0f} nodes, "
         "{:.2f} sec, max depth={:d}, "
-        "hash use={:d}"
+        "hash use={:d}, re-searches={:d}"
         .format(
             nodes_count,
             time_used,
             game_trace.max_depth_searched,
-            hash_use
+            hash_use,
+            search_metrics["researches"]
         )
     )
     # Game-record FILE:
@@ -592,7 +734,7 @@ def display_move_metrics(
     # Main search results:
     print(
         "{:<5}  {:<6} {:>8.2f} {:>+11.5f} {:>7d}{:>12.0f} "
-        "{:>9} {:>9} {:>9} {:>9} {:>9}"
+        "{:>9} {:>9} {:>9} {:>9} {:>9} {:>8d} {:>8d} {:>7.1f}%"
         .format(
             bd.color_name[side],
             move_txt,
@@ -601,7 +743,10 @@ def display_move_metrics(
             game_trace.max_depth_searched,
             nodes_count,
             tt_metrics[0], tt_metrics[1], tt_metrics[2], tt_metrics[3],
-            tt_metrics[4]
+            tt_metrics[4],
+            search_metrics["researches"],
+            search_metrics["full_window_researches"],
+            countermove_hit_rate
         ),
         end="",
         file=metrics_file
@@ -628,8 +773,11 @@ def display_move_metrics(
         ply:ply+20,
         gp.NODE_COUNT_COL
     ]
-    with np.printoptions(formatter={'float': '{:>2.0f}'.format}):
-        print("{}".format(nodes_per_level), file=metrics_file)
+    with np.printoptions(formatter={'int': '{:>2d}'.format}):
+        print("{}".format(nodes_per_level), end="", file=metrics_file)
+
+    # Principal variation.
+    print("  {}".format(pv_txt), file=metrics_file)
 
 
 # Main program.
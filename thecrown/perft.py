@@ -0,0 +1,188 @@
+###############################################################################
+# Perft: counting the leaf nodes of the move generator at a fixed depth.
+###############################################################################
+
+# Standard library imports
+import glob
+import os
+import sys
+import time
+
+# Local application imports
+import board as bd
+import gameplay as gp
+import crownutils as ut
+
+# Paths:
+GAMES_PATH = "/games/"  # Location of saved games.
+# Default depth for the benchmark.
+PERFT_DEPTH = 3
+
+
+def perft(board, depth, t_table=None, bulk_counting=True):
+    """
+    Count the leaf nodes of the game tree from a position to a fixed depth.
+    Ended games (crowning, no pieces, no Princes left) have no moves, and a
+    checkmated Prince leaving the board counts as the only move available.
+
+    Input:
+        board:          Board - the position to count moves from.
+        depth:          int - the number of plies to explore.
+        t_table:        Transposition_table - optional cache of counts,
+                        indexed by the board's hash (or None).
+        bulk_counting:  Boolean - whether moves at the last ply are counted
+                        as generated, rather than making each one.
+
+    Output:
+        nodes:          int - the number of positions found at 'depth'.
+    """
+    if depth == 0:
+        return 1
+
+    # Check for a count of the same position to the same depth.
+    if t_table is not None:
+        value = t_table.retrieve(board.hash)
+        if value is not None and value[gp.DEPTH_SRCH_IDX] == depth:
+            return int(value[gp.VALUE_IDX])
+
+    if depth == 1 and bulk_counting:
+        _, _, game_end, _ = gp.evaluate_terminal(board, 0)
+        if game_end:
+            nodes = 0
+        else:
+            _, nodes = gp.generate_legal_moves(board)
+            if nodes == 0 and gp.prince_in_check(board):
+                nodes = 1  # The Prince leaving.
+    else:
+        nodes = sum(
+            [n for _, n in perft_divide(board, depth, t_table, bulk_counting)]
+        )
+
+    if t_table is not None:
+        t_table.insert(
+            board.hash, [board.hash, 0, nodes, gp.EXACT, None, depth]
+        )
+    return nodes
+
+
+def perft_divide(board, depth, t_table=None, bulk_counting=True):
+    """
+    Count the leaf nodes of the game tree under each legal move of a
+    position, making every pseudomove and discarding the illegal ones.
+
+    Input:
+        board:          Board - the position to count moves from.
+        depth:          int - the number of plies to explore (1 or more).
+        t_table:        Transposition_table - optional cache of counts.
+        bulk_counting:  Boolean - whether moves at the last ply are counted
+                        as generated, rather than making each one.
+
+    Output:
+        divide:         list of pairs [move, nodes], e.g. [[[24, 14], 35]...]
+    """
+    divide = []
+    _, _, game_end, _ = gp.evaluate_terminal(board, 0)
+    if game_end:
+        return divide
+
+    search_trace = []
+    moves, _ = gp.generate_pseudomoves(board)
+    for coord1, coord2 in moves:
+        nodes = perft_move(
+            board, coord1, coord2, depth, t_table, bulk_counting, search_trace
+        )
+        if nodes is not None:
+            divide.append([[coord1, coord2], nodes])
+
+    if divide == [] and gp.prince_in_check(board):
+        # Checkmate: the Prince leaves the board.
+        coord1, coord2 = board.prince[board.turn].coord, None
+        nodes = perft_move(
+            board, coord1, coord2, depth, t_table, bulk_counting, search_trace
+        )
+        divide.append([[coord1, coord2], nodes])
+    return divide
+
+
+def perft_move(
+    board, coord1, coord2, depth, t_table, bulk_counting, search_trace
+):
+    # Make a pseudomove and count its leaf nodes, or None if it's illegal.
+    is_legal_i, _, _, _, _, captured_piece, leaving_piece, old_hash, _ = \
+        gp.make_pseudomove(
+            board, coord1, coord2, 0, gp.DEFAULT_SEARCH_PARAMS,
+            search_trace=search_trace
+        )
+    nodes = perft(board, depth - 1, t_table, bulk_counting) \
+        if is_legal_i else None
+    board.unmake_move(coord1, coord2, captured_piece, leaving_piece, old_hash)
+    search_trace.pop()
+    return nodes
+
+
+def run_perft_benchmark(depth=PERFT_DEPTH, hash_table=False):
+    """
+    Run perft on every position saved in /games, reporting nodes/second.
+
+    Arguments:
+        depth (int):            The number of plies to explore.
+        hash_table (Boolean):   Whether to cache counts in a
+                                Transposition_table.
+    Returns:
+        total_nodes (int):      The sum of nodes counted on all positions.
+    """
+    dir_path = os.path.dirname(os.path.realpath(__file__))
+    file_list = glob.glob(f"{dir_path}{GAMES_PATH}*.cor")
+    file_list.sort()
+    total_nodes, total_time = 0, 0
+    for full_file_name in file_list:
+        file_name = os.path.basename(full_file_name)
+        if file_name.startswith("wrong"):
+            continue  # Deliberately malformed files.
+        board = bd.Board(full_file_name)
+        if not gp.is_legal_loaded_board(board):
+            continue
+        t_table = gp.Transposition_table() if hash_table else None
+        t0 = time.time()
+        nodes = perft(board, depth, t_table)
+        t = time.time() - t0
+        total_nodes += nodes
+        total_time += t
+        print(f"{file_name:<30}{nodes:>12,d}{t:>9.3f}s"
+              f"{nodes / max(t, 1e-9):>12,.0f} nodes/s")
+    print(f"{'Total (depth ' + str(depth) + ')':<30}{total_nodes:>12,d}"
+          f"{total_time:>9.3f}s"
+          f"{total_nodes / max(total_time, 1e-9):>12,.0f} nodes/s")
+    return total_nodes
+
+
+def run_perft_divide(file_name, depth=PERFT_DEPTH):
+    """
+    Print the leaf nodes under each legal move of a saved position.
+
+    Arguments:
+        file_name (string):     A .cor file in /games, e.g. "position_01.cor"
+        depth (int):            The number of plies to explore.
+    Returns:
+        None
+    """
+    dir_path = os.path.dirname(os.path.realpath(__file__))
+    board = bd.Board(f"{dir_path}{GAMES_PATH}{file_name}")
+    total_nodes = 0
+    for move, nodes in perft_divide(board, depth):
+        print(f"{ut.move_2_txt(move)}: {nodes}")
+        total_nodes += nodes
+    print(f"Total: {total_nodes}")
+
+
+if __name__ == "__main__":
+    # If called directly:
+    #   perft.py [depth]                -> benchmark over all saved games.
+    #   perft.py [depth] --hash         -> same, caching counts.
+    #   perft.py [depth] file_name.cor  -> perft-divide on one position.
+    args = sys.argv[1:]
+    depth = int(args.pop(0)) if args and args[0].isdigit() else PERFT_DEPTH
+    if args and args[0].endswith(".cor"):
+        run_perft_divide(args[0], depth)
+    else:
+        run_perft_benchmark(depth, hash_table="--hash" in args)
@@ -58,7 +58,7 @@ def play_tournament(tournament_file_name):
             match["player_1"], match["rnd_1"],
             match["player_2"], match["rnd_2"],
             match["board"], int(match["n_rounds"]),
-            tourn_output_path, tourn_name
+            tourn_output_path, tourn_name, match.get("timing")
         )
         # Update players' scores.
         pass  # Done offline.
@@ -85,6 +85,9 @@ def read_tournament_data(tournament_file_name):
                     None = "initial_position"
         "n_rounds": (int) the number of rounds these players must play.
                     Each round = 2 games, alternating sides.
+        "timing":   (str) time control of the games (optional column),
+                    e.g. "move:5", "game:300+2" (see main.play_game()).
+                    None = no time limit.
     """
     # Aux. function to process strings: numbers to float, "" to None.
     def convert_string(value):
@@ -120,7 +123,7 @@ def read_tournament_data(tournament_file_name):
 
 def play_match(
     player_1, rnd_1, player_2, rnd_2, board_name, n_rounds,
-    tourn_output_path, tourn_name=""
+    tourn_output_path, tourn_name="", timing=None
 ):
     """
     Play a match according to arguments passed.
@@ -144,6 +147,8 @@ def play_match(
                         Full route to text file to update match results.
         tourn_name (str):
                         Name of the tournament (e.g. "I_Crown_Tournament")
+        timing (str):   Time control of the games, e.g. "game:300+2".
+                        None = no time limit.
 
     Returns:
         float:          Score obtained by player_1
@@ -197,7 +202,7 @@ def play_match(
                 sys.exit(1)
             game_result, end_status, rec_file_path, metrics_file_path = \
                 main.play_game(
-                    board, board_file_name, player_set,
+                    board, board_file_name, player_set, timing=timing,
                     game_type=game_type, round=round + 1, tourn_name=tourn_name
                 )
             # Check results and update scorings.